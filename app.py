@@ -1,7 +1,14 @@
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+import pandas as pd
 import streamlit as st
 from src.simulation import Simulation
 from src.event import EventHeap
 from src.math_utils import make_str
+from src.analytic import solve
+from src.stopping import RATIOS
 
 
 # set title of the page
@@ -22,10 +29,19 @@ st.subheader("General Settings")
 col1, col2, col3 = st.columns([1, 1, 2])
 
 queue_capacity = col1.number_input("Queue Capacity", 0, step=1)
+if col1.checkbox("Unlimited Queue"):
+    queue_capacity = None
 no_of_servers = col2.number_input("Number of Servers", 0, step=1)
-# speed = col3.slider("Simulation Speed", 0, 3, step=1)
-speed = None
-duration = col3.slider("Simulation Duration", 500, 50000, step=500)
+seed = col2.number_input("Seed", 0, step=1, help="Runs with the same settings and seed give the same results")
+event_driven = col3.checkbox(
+    "Event-driven run",
+    help="Jump directly from event to event instead of advancing time in fixed steps"
+)
+warmup = col3.checkbox(
+    "Delete warm-up automatically",
+    help="Find the end of the initial transient with MSER-5 and leave it out of the statistics"
+)
+duration = col3.slider("Simulation Duration", 500, 1000000 if event_driven else 50000, step=500)
 
 # arrival settings
 st.subheader("Arrival Settings")
@@ -178,6 +194,31 @@ if service_dependency:
 else:
     service_dependency_start, service_dependency_half, service_dependency_stop = None, None, None
 
+server_policy = st.columns(2)[0].selectbox(
+    "Server Assignment Policy",
+    ["Random", "Round Robin", "Longest Idle", "Least Utilized", "Fastest"],
+    help="How the next service picks among the idle servers"
+)
+
+server_speed = st.checkbox("Servers could work at different speeds")
+if server_speed:
+    col, _ = st.columns(2)
+    server_speeds = col.text_input(
+        "Server Speeds",
+        ", ".join(["1.0"]*no_of_servers),
+        help="Comma-separated speed of each server; service time is divided by \
+            the speed of the server giving the service"
+    )
+    try:
+        server_speeds = [float(speed) for speed in server_speeds.split(",")]
+    except ValueError:
+        server_speeds = []
+    if len(server_speeds) != no_of_servers or min(server_speeds, default=0) <= 0:
+        col.error(f"Enter {no_of_servers} positive speeds separated by commas")
+        st.stop()
+else:
+    server_speeds = None
+
 priority_customer = st.checkbox("Some Customers would have priority in \
     receiving service")
 if priority_customer:
@@ -290,72 +331,211 @@ k_star = col3.number_input(
 # simulation
 st.header("Simulation")
 
+
+NO_OF_SNAPSHOTS = 200
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, tuple[dict, float]]] = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def key(config: dict) -> str:
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def get(self, config: dict) -> tuple[dict, float] | None:
+        key = self.key(config)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic()-entry[0] > self.ttl:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, config: dict, result: tuple[dict, float]) -> None:
+        key = self.key(config)
+        with self.lock:
+            self.entries[key] = (time.monotonic(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+@st.cache_resource
+def result_cache() -> ResultCache:
+    return ResultCache(max_entries=64, ttl=3600)
+
+
+def simulate(config: dict, on_snapshot) -> tuple[dict, float]:
+    simulation = Simulation(EventHeap(), **config)
+    for snapshot in simulation.steps(config['duration']/NO_OF_SNAPSHOTS):
+        on_snapshot(snapshot)
+    return simulation.report(), simulation.duration
+
+
+stop_early = st.checkbox(
+    "Stop once precise enough",
+    help="Treat the duration as a budget and stop as soon as the chosen statistics reach the target relative \
+        half-width at 95% confidence, estimated by batch means"
+)
+precision = None
+if stop_early:
+    col1, col2 = st.columns([3, 1])
+    precision_statistics = col1.multiselect(
+        "Statistics",
+        list(RATIOS),
+        default=['average_time_spent_per_customer_queue'],
+        format_func=lambda key: key.replace('_', ' ').capitalize()
+    )
+    relative_half_width = col2.number_input("Relative Half-width (%)", 0.1, 50.0, 5.0, step=0.5)
+    if precision_statistics:
+        precision = {key: relative_half_width/100 for key in precision_statistics}
+
+
+show_analytic = st.checkbox(
+    "Compare with analytic values",
+    help="For M/M/c, M/M/c/K and M/G/1 settings, show the exact steady-state values next to the simulated ones"
+)
+
 st.write("")
 if st.button("Start Simulation", type="primary"):
-    with st.spinner(text="simulating..."):
-        event_heap = EventHeap()
-        simulation = Simulation(
-            event_heap,
-            queue_capacity,
-            no_of_servers,
-            arrival_distribution,
-            service_distribution,
-            discipline,
-            t_star,
-            k_star,
-            speed,
-            duration,
-            arrival_batch_probability,
-            arrival_batch_distribution,
-            service_batch_probability,
-            service_batch_distribution,
-            service_dependency,
-            service_dependency_start,
-            service_dependency_half,
-            service_dependency_stop,
-            server_select_rand_probability,
-            priority_probability,
-            priority_service_distribution,
-            bulk,
-            bulk_start,
-            bulk_half,
-            bulk_stop,
-            renege,
-            renege_start,
-            renege_half,
-            renege_stop
-        )
-
-        simulation.run()
-
-        st.markdown(f"""
-                    |Statistics|Result|
-                    |:-|:-:|
-                    |All Time Customers|{simulation.system.all_time_no_of_customers}|
-                    |All Time Customers in System|{simulation.system.all_time_no_of_customers_system}|
-                    |Average Customers in System|{simulation.system.average_no_of_customers_system}|
-                    |Average Time Spent per Customers in System|{simulation.system.average_time_spent_per_customer}|
-                    |All Time Customers in Queue|{simulation.system.all_time_no_of_customers_queue}|
-                    |Average Customers in Queue|{simulation.system.queue.average_no_of_customers}|
-                    |Average Time Spent per Customers in Queue|{simulation.system.queue.average_time_spent_per_customer}|
-                    |All Time Customers in Service Center|{simulation.system.all_time_no_of_customers_service_center}|
-                    |Average Customers in Service Center|{simulation.system.service_center.average_no_of_customers}|
-                    |Average Time Spent per Customers in Service Center|{simulation.system.service_center.average_time_spent_per_customer}|
-                    |Departed Customers|{simulation.system.no_of_finished_customers} ({round(100*simulation.system.no_of_finished_customers/simulation.system.all_time_no_of_customers, 2) if simulation.system.all_time_no_of_customers else 0.0}%)|
-                    |Still Waiting Customers|{simulation.system.no_of_unfinished_customers} ({round(100*simulation.system.no_of_unfinished_customers/simulation.system.all_time_no_of_customers, 2) if simulation.system.all_time_no_of_customers else 0.0}%)|
-                    |Still Waiting Customers in Queue|{len(simulation.system.queue)} ({round(100*len(simulation.system.queue)/simulation.system.no_of_unfinished_customers, 2) if simulation.system.no_of_unfinished_customers else 0.0}%)|
-                    |Still Waiting Customers in Service Center|{len(simulation.system.service_center)} ({round(100*len(simulation.system.service_center)/simulation.system.no_of_unfinished_customers, 2) if simulation.system.no_of_unfinished_customers else 0.0}%)|
-                    |Turned Away Customers Due to Maximum Capacity|{simulation.system.no_of_customers_turned_away} ({round(100*simulation.system.proportion_of_customers_turned_away, 2)}%)|
-                    |Bulked Customers|{simulation.system.no_of_bulking} ({round(100*simulation.system.proportion_of_bulking, 2)}%)|
-                    |Reneged Customers|{simulation.system.queue.no_of_reneging} ({round(100*simulation.system.queue.proportion_of_reneging, 2)}%)|
-                    |Customers Skip Queue to Service Center|{simulation.system.no_of_customers_skip_queue} ({round(100*simulation.system.proportion_of_customers_skip_queue, 2)}%)|
-                    |Customers Delayed Longer than {simulation.system.queue.t_star}s|{simulation.system.queue.no_of_customers_delayed_longer_t_star} ({round(100*simulation.system.queue.proportion_of_customers_delayed_longer_t_star, 2)}%)|
-                    |Percent of Time Queue Contained More than {simulation.system.queue.k_star} Customers|{simulation.system.queue.total_time_queue_contains_more_k_star_customers} ({round(100*simulation.system.queue.proportion_of_time_queue_contains_more_k_star_customers, 2)}%)|
-                    |Arrivals|{simulation.system.no_of_arrivals}|
-                    |Arrival Rate|{simulation.system.arrival_rate}|
-                    |Service Rate|{simulation.system.service_center.service_rate}|
-                    |Average Service Rate|{simulation.system.service_center.average_service_rate}|
-                    |Average Server Utilization|{simulation.system.service_center.average_server_utilization}|
-                    |Average Arrival Batch Size|{simulation.system.average_arrival_batch_size}|
-                    |Average Service Batch Size|{simulation.system.service_center.average_service_batch_size}|
-        """)
+    config = dict(
+        queue_capacity=queue_capacity,
+        no_of_servers=no_of_servers,
+        arrival_distribution=arrival_distribution,
+        service_distribution=service_distribution,
+        discipline=discipline,
+        t_star=t_star,
+        k_star=k_star,
+        duration=duration,
+        arrival_batch_probability=arrival_batch_probability,
+        arrival_batch_distribution=arrival_batch_distribution,
+        service_batch_probability=service_batch_probability,
+        service_batch_distribution=service_batch_distribution,
+        service_dependency=service_dependency,
+        service_dependency_start=service_dependency_start,
+        service_dependency_half=service_dependency_half,
+        service_dependency_stop=service_dependency_stop,
+        server_select_rand_probability=server_select_rand_probability,
+        priority_probability=priority_probability,
+        priority_service_distribution=priority_service_distribution,
+        bulk=bulk,
+        bulk_start=bulk_start,
+        bulk_half=bulk_half,
+        bulk_stop=bulk_stop,
+        renege=renege,
+        renege_start=renege_start,
+        renege_half=renege_half,
+        renege_stop=renege_stop,
+        seed=seed,
+        event_driven=event_driven,
+        server_policy=server_policy,
+        server_speeds=server_speeds,
+        warmup='auto' if warmup else None,
+        precision=precision
+    )
+    cached = result_cache().get(config)
+    if cached is not None:
+        result, stopped_at = cached
+    else:
+        stop = st.empty()
+        stop.button("Stop", help="Cancel the running simulation")
+        progress_bar = st.progress(0)
+        chart = st.empty()
+        live_chart = chart.line_chart()
+        snapshots = []
+
+        def show_snapshot(snapshot):
+            snapshots.append(snapshot)
+            progress_bar.progress(snapshot.progress)
+            live_chart.add_rows(pd.DataFrame({
+                "Queue Length": [snapshot.length_of_queue],
+                "Busy Servers": [snapshot.no_of_busy_servers],
+                "Average Customers in System": [snapshot.average_no_of_customers_system],
+            }, index=[snapshot.time]))
+
+        with st.spinner(text="simulating..."):
+            result, stopped_at = simulate(config, show_snapshot)
+        result_cache().put(config, (result, stopped_at))
+        stop.empty()
+        progress_bar.empty()
+        if not snapshots:
+            chart.empty()
+
+    if precision is not None:
+        if stopped_at < duration:
+            st.success(f"Target precision reached at time {stopped_at} of the {duration} budget.")
+        else:
+            st.warning("Target precision not reached within the duration budget.")
+
+    all_time = result['all_time_no_of_customers']
+    unfinished = result['no_of_unfinished_customers']
+    st.markdown(f"""
+                |Statistics|Result|
+                |:-|:-:|
+                |All Time Customers|{all_time}|
+                |All Time Customers in System|{result['all_time_no_of_customers_system']}|
+                |Average Customers in System|{result['average_no_of_customers_system']}|
+                |Average Time Spent per Customers in System|{result['average_time_spent_per_customer_system']}|
+                |All Time Customers in Queue|{result['all_time_no_of_customers_queue']}|
+                |Average Customers in Queue|{result['average_no_of_customers_queue']}|
+                |Average Time Spent per Customers in Queue|{result['average_time_spent_per_customer_queue']}|
+                |All Time Customers in Service Center|{result['all_time_no_of_customers_service_center']}|
+                |Average Customers in Service Center|{result['average_no_of_customers_service_center']}|
+                |Average Time Spent per Customers in Service Center|{result['average_time_spent_per_customer_service_center']}|
+                |Departed Customers|{result['no_of_finished_customers']} ({round(100*result['no_of_finished_customers']/all_time, 2) if all_time else 0.0}%)|
+                |Still Waiting Customers|{unfinished} ({round(100*unfinished/all_time, 2) if all_time else 0.0}%)|
+                |Still Waiting Customers in Queue|{result['no_of_unfinished_customers_queue']} ({round(100*result['no_of_unfinished_customers_queue']/unfinished, 2) if unfinished else 0.0}%)|
+                |Still Waiting Customers in Service Center|{result['no_of_unfinished_customers_service_center']} ({round(100*result['no_of_unfinished_customers_service_center']/unfinished, 2) if unfinished else 0.0}%)|
+                |Turned Away Customers Due to Maximum Capacity|{result['no_of_customers_turned_away']} ({round(100*result['proportion_of_customers_turned_away'], 2)}%)|
+                |Bulked Customers|{result['no_of_bulking']} ({round(100*result['proportion_of_bulking'], 2)}%)|
+                |Reneged Customers|{result['no_of_reneging']} ({round(100*result['proportion_of_reneging'], 2)}%)|
+                |Customers Skip Queue to Service Center|{result['no_of_customers_skip_queue']} ({round(100*result['proportion_of_customers_skip_queue'], 2)}%)|
+                |Customers Delayed Longer than {t_star}s|{result['no_of_customers_delayed_longer_t_star']} ({round(100*result['proportion_of_customers_delayed_longer_t_star'], 2)}%)|
+                |Percent of Time Queue Contained More than {k_star} Customers|{result['total_time_queue_contains_more_k_star_customers']} ({round(100*result['proportion_of_time_queue_contains_more_k_star_customers'], 2)}%)|
+                |Arrivals|{result['no_of_arrivals']}|
+                |Arrival Rate|{result['arrival_rate']}|
+                |Service Rate|{result['service_rate']}|
+                |Average Service Rate|{result['average_service_rate']}|
+                |Average Server Utilization|{result['average_server_utilization']}|
+                |Average Arrival Batch Size|{result['average_arrival_batch_size']}|
+                |Average Service Batch Size|{result['average_service_batch_size']}|
+    """)
+
+    if show_analytic:
+        try:
+            analytic = solve(config)
+        except ValueError as error:
+            st.warning(f"No steady state to compare with: {error}")
+        else:
+            if analytic is None:
+                st.info("These settings are not an M/M/c, M/M/c/K or M/G/1 model, so there are no analytic values.")
+            else:
+                labels = {
+                    'average_no_of_customers_system': "Average Customers in System",
+                    'average_time_spent_per_customer_system': "Average Time Spent per Customers in System",
+                    'average_no_of_customers_queue': "Average Customers in Queue",
+                    'average_time_spent_per_customer_queue': "Average Time Spent per Customers in Queue",
+                    'average_no_of_customers_service_center': "Average Customers in Service Center",
+                    'average_time_spent_per_customer_service_center':
+                        "Average Time Spent per Customers in Service Center",
+                    'proportion_of_customers_turned_away': "Turned Away Customers Due to Maximum Capacity",
+                    'proportion_of_customers_skip_queue': "Customers Skip Queue to Service Center",
+                    'proportion_of_customers_delayed_longer_t_star': f"Customers Delayed Longer than {t_star}s",
+                    'proportion_of_time_queue_contains_more_k_star_customers':
+                        f"Time Queue Contained More than {k_star} Customers",
+                    'arrival_rate': "Arrival Rate",
+                    'service_rate': "Service Rate",
+                    'average_service_rate': "Average Service Rate",
+                    'average_server_utilization': "Average Server Utilization",
+                }
+                rows = "\n".join(
+                    f"|{label}|{result[key]}|{analytic[key]}|" for key, label in labels.items() if key in analytic
+                )
+                st.markdown(
+                    f"**Analytic comparison ({analytic['model']})**\n\n"
+                    f"|Statistics|Simulated|Analytic|\n|:-|:-:|:-:|\n{rows}"
+                )
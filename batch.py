@@ -0,0 +1,57 @@
+import argparse
+import csv
+import json
+import sys
+from src.simulation import Simulation
+from src.event import EventHeap, CalendarQueue
+
+
+EVENT_LISTS = {'EventHeap': EventHeap, 'CalendarQueue': CalendarQueue}
+
+
+def load_scenarios(path: str) -> list[dict]:
+    with open(path) as file:
+        scenarios = json.load(file)
+    return scenarios if isinstance(scenarios, list) else [scenarios]
+
+
+def run_scenario(scenario: dict, index: int, seed: int | None) -> dict:
+    config = dict(scenario)
+    name = config.pop('name', str(index))
+    event_list = EVENT_LISTS[config.pop('event_list', 'EventHeap')]()
+    config.setdefault('seed', seed)
+    simulation = Simulation(event_list, **config)
+    simulation.run()
+    return {'name': name, **simulation.report()}
+
+
+def write_results(results: list[dict], output: str | None, format: str) -> None:
+    file = open(output, 'w', newline='') if output else sys.stdout
+    try:
+        if format == 'csv':
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+    finally:
+        if output:
+            file.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run queue simulation scenarios without the Streamlit app.")
+    parser.add_argument('scenario', help="JSON file with one scenario object or a list of them")
+    parser.add_argument('-o', '--output', help="file to write results to (default: standard output)")
+    parser.add_argument('-f', '--format', choices=['json', 'csv'], help="output format (default: from the extension)")
+    parser.add_argument('--seed', type=int, help="seed for scenarios that do not set their own")
+    args = parser.parse_args(argv)
+
+    format = args.format or ('csv' if args.output and args.output.endswith('.csv') else 'json')
+    results = [run_scenario(scenario, i, args.seed) for i, scenario in enumerate(load_scenarios(args.scenario))]
+    write_results(results, args.output, format)
+
+
+if __name__ == '__main__':
+    main()
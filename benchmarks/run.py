@@ -0,0 +1,176 @@
+from __future__ import annotations
+from timeit import Timer
+from typing import Callable
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from src.event import EventHeap, CalendarQueue, Arrival
+from src.math_utils import distribution, sampler, boolean_function
+from src.queue_management import Queue
+from src.random_stream import RandomStream
+from src.simulation import Simulation
+from src.customer_store import CustomerStore
+
+
+DISTRIBUTIONS = [
+    ("Constant(2.0)", False),
+    ("Discrete Uniform(1, 5)", True),
+    ("Continuous Uniform(1.0, 3.0)", False),
+    ("Normal(2.5, 0.5)", False),
+    ("Poisson(2.0)", True),
+    ("Exponential(2.0)", False),
+]
+
+SCENARIOS = {
+    'M/M/1': dict(
+        queue_capacity=1000, no_of_servers=1, arrival_distribution="Exponential(1.0)",
+        service_distribution="Exponential(0.8)", discipline="FIFO", t_star=2, k_star=3
+    ),
+    'M/M/c batch': dict(
+        queue_capacity=1000, no_of_servers=4, arrival_distribution="Exponential(1.0)",
+        service_distribution="Exponential(5.0)", discipline="FIFO", t_star=2, k_star=3,
+        arrival_batch_probability=0.3, arrival_batch_distribution="Discrete Uniform(1, 3)",
+        service_batch_probability=0.2, service_batch_distribution="Constant(2)"
+    ),
+    'Normal renege bulk': dict(
+        queue_capacity=1000, no_of_servers=2, arrival_distribution="Exponential(1.0)",
+        service_distribution="Normal(2.5, 0.5)", discipline="FIFO", t_star=2, k_star=3,
+        bulk=True, bulk_start=5, bulk_half=10, bulk_stop=20,
+        renege=True, renege_start=2, renege_half=5, renege_stop=10
+    ),
+}
+
+DURATIONS = [1000, 10000, 100000]
+
+
+def per_call(function: Callable[[], object], repeat: int = 5) -> float:
+    timer = Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number))/number
+
+
+def event_list_cycle(event_list_type: type, size: int) -> Callable[[], None]:
+    stream = RandomStream(0)
+    events = event_list_type()
+    for _ in range(size):
+        events.add(Arrival(stream.exponential()*size))
+
+    def cycle() -> None:
+        event = events.pop()
+        events.add(Arrival(event.time+stream.exponential()*size))
+    return cycle
+
+
+def queue_cycle(discipline: str, size: int, renege: bool = False) -> Callable[[], None]:
+    stream = RandomStream(0)
+    customers = CustomerStore()
+    events = EventHeap()
+    queue = Queue(events, None, 0, renege, 2, 5, 10, 2, 3, discipline, 0.1, stream, customers)
+    queue.join(customers.add(0, False, size))
+    clock = [0.0]
+
+    def cycle() -> None:
+        clock[0] += 0.01
+        queue.join(customers.add(clock[0], False))
+        if not events.is_empty() and events.peek().time <= clock[0]:
+            queue.renege_customer(events.pop().customer, clock[0])
+        else:
+            next(queue.pop(1))
+    return cycle
+
+
+def micro_benchmarks() -> dict[str, float]:
+    results = {}
+    stream = RandomStream(0)
+    for dist, is_integer in DISTRIBUTIONS:
+        results[f"distribution({dist})"] = per_call(lambda: distribution(dist, 2, is_integer))
+        compiled = sampler(dist, 2, stream, is_integer)
+        results[f"sampler({dist})"] = per_call(compiled)
+    results["boolean_function(0.3)"] = per_call(lambda: boolean_function(0.3, stream))
+    for event_list_type in (EventHeap, CalendarQueue):
+        for size in (10, 10000):
+            results[f"{event_list_type.__name__}.pop+add[{size}]"] = per_call(event_list_cycle(event_list_type, size))
+    for discipline in ('FIFO', 'LIFO', 'SIRO'):
+        for size in (10, 10000):
+            results[f"Queue.join+pop[{discipline}, {size}]"] = per_call(queue_cycle(discipline, size))
+    results["Queue.join+pop[FIFO, 10000, renege]"] = per_call(queue_cycle('FIFO', 10000, renege=True))
+    return results
+
+
+def macro_benchmark(config: dict, duration: int, event_driven: bool, memory: bool) -> dict[str, float]:
+    simulation = Simulation(EventHeap(), **config, duration=duration, seed=0, event_driven=event_driven)
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    simulation.run()
+    elapsed = time.perf_counter()-start
+    result = {'seconds': elapsed}
+    if memory:
+        result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1]/2**20
+        tracemalloc.stop()
+    system = simulation.system
+    no_of_events = system.no_of_arrivals + int(system.service_center.servers.statistics.no_of_services.sum()) \
+        + system.queue.no_of_reneging
+    result['events'] = no_of_events
+    result['events_per_second'] = no_of_events/elapsed
+    return result
+
+
+def macro_benchmarks(durations: list[int], memory: bool) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, config in SCENARIOS.items():
+        for duration in durations:
+            for event_driven in (False, True):
+                key = f"{name} [duration={duration}, {'event-driven' if event_driven else 'tick'}]"
+                results[key] = macro_benchmark(config, duration, event_driven, memory=False)
+                if memory:
+                    results[key]['peak_memory_mb'] = macro_benchmark(
+                        config, duration, event_driven, memory=True
+                    )['peak_memory_mb']
+    return results
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print("\nComparison against baseline (>1 means faster now)")
+    for key, seconds in current['micro'].items():
+        if key in baseline['micro']:
+            print(f"  {key:55s} {baseline['micro'][key]/seconds:8.2f}x")
+    for key, result in current['macro'].items():
+        if key in baseline['macro']:
+            ratio = result['events_per_second']/baseline['macro'][key]['events_per_second']
+            print(f"  {key:55s} {ratio:8.2f}x")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sampling, event lists, queues and whole simulation runs.")
+    parser.add_argument('-o', '--output', default='benchmarks/results/latest.json', help="where to store the results")
+    parser.add_argument('--baseline', help="results file to compare against")
+    parser.add_argument('--durations', type=int, nargs='+', default=DURATIONS, help="durations for the macro runs")
+    parser.add_argument('--skip-micro', action='store_true', help="only run the end-to-end simulations")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced peak-memory runs")
+    args = parser.parse_args(argv)
+
+    results = {'python': platform.python_version(), 'micro': {}, 'macro': {}}
+    if not args.skip_micro:
+        results['micro'] = micro_benchmarks()
+        for key, seconds in results['micro'].items():
+            print(f"{key:55s} {seconds*1e9:12.1f} ns/op")
+    results['macro'] = macro_benchmarks(args.durations, not args.no_memory)
+    for key, result in results['macro'].items():
+        memory = f" {result['peak_memory_mb']:8.1f} MB" if 'peak_memory_mb' in result else ""
+        print(f"{key:55s} {result['events_per_second']:12.0f} events/s{memory}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
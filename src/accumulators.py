@@ -0,0 +1,112 @@
+from __future__ import annotations
+from typing import Any
+
+
+class CompensatedSum:
+    __slots__ = ('total', 'compensation')
+
+    def __init__(self) -> None:
+        self.total: float = 0.0
+        self.compensation: float = 0.0
+
+    @property
+    def value(self) -> float:
+        return self.total+self.compensation
+
+    def add(self, x: float) -> None:
+        total = self.total+x
+        if abs(self.total) >= abs(x):
+            self.compensation += (self.total-total)+x
+        else:
+            self.compensation += (x-total)+self.total
+        self.total = total
+
+
+class TimeWeightedAverage:
+    __slots__ = ('integral', 'start_time', 'last_time', 'last_value')
+
+    def __init__(self, time: float = 0, value: float = 0) -> None:
+        self.integral = CompensatedSum()
+        self.start_time = time
+        self.last_time = time
+        self.last_value = value
+
+    @property
+    def area(self) -> float:
+        return self.integral.value
+
+    @property
+    def elapsed(self) -> float:
+        return self.last_time-self.start_time
+
+    @property
+    def mean(self) -> float:
+        if self.elapsed == 0:
+            return 0
+        return self.area/self.elapsed
+
+    def update(self, time: float, value: float) -> None:
+        self.integral.add(self.last_value*(time-self.last_time))
+        self.last_time = time
+        self.last_value = value
+
+    def copy(self) -> TimeWeightedAverage:
+        copy = TimeWeightedAverage(self.start_time, self.last_value)
+        copy.integral.add(self.area)
+        copy.last_time = self.last_time
+        return copy
+
+    def remove(self, earlier: TimeWeightedAverage) -> None:
+        self.integral.add(-earlier.area)
+        self.start_time = earlier.last_time
+
+
+class Welford:
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return 0
+        return self.m2/(self.count-1)
+
+    def add(self, x: float, n: int = 1) -> None:
+        self.count += n
+        delta = x-self.mean
+        self.mean += delta*n/self.count
+        self.m2 += delta*(x-self.mean)*n
+
+    def copy(self) -> Welford:
+        copy = Welford()
+        copy.count, copy.mean, copy.m2 = self.count, self.mean, self.m2
+        return copy
+
+    def remove(self, earlier: Welford) -> None:
+        count = self.count-earlier.count
+        if count == 0:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.mean*self.count-earlier.mean*earlier.count)/count
+        delta = mean-earlier.mean
+        self.m2 -= earlier.m2+delta*delta*earlier.count*count/self.count
+        self.count, self.mean = count, mean
+
+
+def copy_state(owner: object, counters: tuple[str, ...], accumulators: tuple[str, ...]) -> dict[str, Any]:
+    state = {name: getattr(owner, name) for name in counters}
+    state.update({name: getattr(owner, name).copy() for name in accumulators})
+    return state
+
+
+def remove_state(
+    owner: object, state: dict[str, Any], counters: tuple[str, ...], accumulators: tuple[str, ...]
+) -> None:
+    for name in counters:
+        setattr(owner, name, getattr(owner, name)-state[name])
+    for name in accumulators:
+        getattr(owner, name).remove(state[name])
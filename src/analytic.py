@@ -0,0 +1,152 @@
+from __future__ import annotations
+from math import lgamma, log, exp
+import numpy as np
+from . import PRECISION
+from src.math_utils import (
+    Distribution, Constant, DiscreteUniform, ContinuousUniform, Normal, Poisson, Exponential, sampler
+)
+from src.random_stream import default_stream
+from src.simulation import Simulation
+
+
+TIME_PRECISION = Simulation.TIME_PRECISION
+PLAIN_DEFAULTS = {
+    'arrival_batch_probability': 0,
+    'service_batch_probability': 0,
+    'service_dependency': False,
+    'server_select_rand_probability': 0,
+    'priority_probability': 0,
+    'bulk': False,
+    'renege': False,
+}
+
+
+def moments(distribution: Distribution) -> tuple[float, float] | None:
+    if isinstance(distribution, Constant):
+        return distribution.value, distribution.value**2
+    if isinstance(distribution, DiscreteUniform):
+        values = np.arange(distribution.a, distribution.b+1)
+        return float(values.mean()), float((values**2).mean())
+    if isinstance(distribution, ContinuousUniform):
+        a, b = distribution.a, distribution.b
+        return (a+b)/2, (a*a+a*b+b*b)/3
+    if isinstance(distribution, (Normal, Poisson)):
+        values, pmf = np.array(distribution.table.values), distribution.table.pmf()
+        return float(values @ pmf), float(values**2 @ pmf)
+    if isinstance(distribution, Exponential):
+        return distribution.scale, 2*distribution.scale**2
+    return None
+
+
+def classify(config: dict) -> str | None:
+    if any(config.get(key, default) != default for key, default in PLAIN_DEFAULTS.items()):
+        return None
+    if config.get('discipline', 'FIFO') != 'FIFO' or config['no_of_servers'] < 1:
+        return None
+    speeds = config.get('server_speeds')
+    if speeds is not None and len(set(speeds)) > 1:
+        return None
+    if not isinstance(config['arrival_distribution'], str) or not isinstance(config['service_distribution'], str):
+        return None
+    arrival = sampler(config['arrival_distribution'], TIME_PRECISION, default_stream)
+    service = sampler(config['service_distribution'], TIME_PRECISION, default_stream)
+    if not isinstance(arrival, Exponential) or moments(service) is None:
+        return None
+    if isinstance(service, Exponential):
+        return 'M/M/c' if config['queue_capacity'] is None else 'M/M/c/K'
+    if config['no_of_servers'] == 1 and config['queue_capacity'] is None:
+        return 'M/G/1'
+    return None
+
+
+def mmck(
+    arrival_rate: float, service_rate: float, no_of_servers: int, queue_capacity: int | None, t_star: float, k_star: int
+) -> dict[str, float]:
+    c, a = no_of_servers, arrival_rate/service_rate
+    rho = a/c
+    if queue_capacity is None and rho >= 1:
+        raise ValueError(f"unstable system: utilization {rho} is not below 1")
+    log_low = np.array([n*log(a)-lgamma(n+1) for n in range(c)])
+    log_top = c*log(a)-lgamma(c+1)
+    if queue_capacity is None:
+        log_queued = log_top-log(1-rho)
+        log_norm = np.logaddexp.reduce(np.append(log_low, log_queued))
+        queued = exp(log_queued-log_norm)
+        blocking = 0.0
+        length_of_queue = queued*rho/(1-rho)
+        waiting_probability = queued
+        queue_at_least_k = 1.0 if k_star <= 0 else queued*rho**k_star
+        delayed = exp(-(c*service_rate-arrival_rate)*t_star)
+    else:
+        j = np.arange(queue_capacity+1)
+        log_high = log_top+j*log(rho)
+        log_norm = np.logaddexp.reduce(np.concatenate([log_low, log_high]))
+        high = np.exp(log_high-log_norm)
+        blocking = float(high[-1])
+        length_of_queue = float(j @ high)
+        waiting_probability = float(high[:-1].sum())/(1-blocking) if queue_capacity > 0 else 0.0
+        queue_at_least_k = 1.0 if k_star <= 0 else float(high[k_star:].sum())
+        if queue_capacity > 0 and t_star > 0:
+            import scipy.stats as sc
+            weights = high[:-1]/high[:-1].sum()
+            delayed = float(weights @ sc.poisson.cdf(j[:-1], c*service_rate*t_star))
+        else:
+            delayed = 1.0 if queue_capacity > 0 else 0.0
+    effective_arrival_rate = arrival_rate*(1-blocking)
+    in_service = effective_arrival_rate/service_rate
+    time_in_queue = length_of_queue/effective_arrival_rate
+    return {
+        'average_no_of_customers_system': length_of_queue+in_service,
+        'average_time_spent_per_customer_system': time_in_queue+1/service_rate,
+        'average_no_of_customers_queue': length_of_queue,
+        'average_time_spent_per_customer_queue': time_in_queue/waiting_probability if waiting_probability else 0.0,
+        'average_no_of_customers_service_center': in_service,
+        'average_time_spent_per_customer_service_center': 1/service_rate,
+        'proportion_of_customers_turned_away': blocking,
+        'proportion_of_customers_skip_queue': 1-waiting_probability,
+        'proportion_of_customers_delayed_longer_t_star': delayed,
+        'proportion_of_time_queue_contains_more_k_star_customers': queue_at_least_k,
+        'arrival_rate': arrival_rate,
+        'service_rate': c*service_rate,
+        'average_service_rate': service_rate,
+        'average_server_utilization': in_service/c,
+    }
+
+
+def mg1(arrival_rate: float, mean: float, second_moment: float) -> dict[str, float]:
+    rho = arrival_rate*mean
+    if rho >= 1:
+        raise ValueError(f"unstable system: utilization {rho} is not below 1")
+    time_in_queue = arrival_rate*second_moment/(2*(1-rho))
+    return {
+        'average_no_of_customers_system': arrival_rate*(time_in_queue+mean),
+        'average_time_spent_per_customer_system': time_in_queue+mean,
+        'average_no_of_customers_queue': arrival_rate*time_in_queue,
+        'average_time_spent_per_customer_queue': time_in_queue/rho if rho else 0.0,
+        'average_no_of_customers_service_center': rho,
+        'average_time_spent_per_customer_service_center': mean,
+        'proportion_of_customers_turned_away': 0.0,
+        'proportion_of_customers_skip_queue': 1-rho,
+        'arrival_rate': arrival_rate,
+        'service_rate': 1/mean,
+        'average_service_rate': 1/mean,
+        'average_server_utilization': rho,
+    }
+
+
+def solve(config: dict) -> dict[str, float] | None:
+    model = classify(config)
+    if model is None:
+        return None
+    arrival = sampler(config['arrival_distribution'], TIME_PRECISION, default_stream)
+    service = sampler(config['service_distribution'], TIME_PRECISION, default_stream)
+    speed = (config.get('server_speeds') or [1])[0]
+    if model == 'M/G/1':
+        mean, second_moment = moments(service)
+        result = mg1(1/arrival.scale, mean/speed, second_moment/speed**2)
+    else:
+        result = mmck(
+            1/arrival.scale, speed/service.scale, config['no_of_servers'], config['queue_capacity'],
+            config['t_star'], config['k_star']
+        )
+    return {'model': model, **{key: round(value, PRECISION) for key, value in result.items()}}
@@ -0,0 +1,37 @@
+from __future__ import annotations
+import numpy as np
+
+
+class CustomerStore:
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY) -> None:
+        self.arrival_time = np.empty(capacity)
+        self.priority = np.empty(capacity, dtype=np.bool_)
+        self.batch = np.empty(capacity, dtype=np.int64)
+        self.size: int = 0
+        self.no_of_batches: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"[Customers:{self.size} - Batches:{self.no_of_batches}]"
+
+    def grow(self, capacity: int) -> None:
+        for name in ('arrival_time', 'priority', 'batch'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, arrival_time: float, priority: bool, count: int = 1) -> range:
+        start, stop = self.size, self.size+count
+        if stop > len(self.arrival_time):
+            self.grow(max(2*len(self.arrival_time), stop))
+        self.arrival_time[start:stop] = arrival_time
+        self.priority[start:stop] = priority
+        self.batch[start:stop] = self.no_of_batches
+        self.size = stop
+        self.no_of_batches += 1
+        return range(start, stop)
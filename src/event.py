@@ -1,120 +1,213 @@
 from __future__ import annotations
+from abc import ABC, abstractmethod
+from bisect import insort
+from heapq import heapify, heappop, heappush
+from enum import IntEnum
+from itertools import count
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from src.service_center import Service
 
 
+class EventType(IntEnum):
+    ARRIVAL = 0
+    SERVICE_END = 1
+    RENEGE = 2
+    WARMUP = 3
+
+    @property
+    def label(self) -> str:
+        return self.name.replace('_', ' ').title()
+
+
 class Event:
-    def __init__(self, type: str, time: float) -> None:
-        self.type = type
+    __slots__ = ('time', 'cancelled')
+    type: EventType
+
+    def __init__(self, time: float) -> None:
         self.time = time
+        self.cancelled = False
 
     def __repr__(self) -> str:
-        return f"{self.type}:{self.time}"
+        return f"{self.type.label}:{self.time}"
 
     def __lt__(self, other) -> bool:
         return self.time < other.time
 
 
 class Arrival(Event):
-    def __init__(self, time: float) -> None:
-        super().__init__("Arrival", time)
+    __slots__ = ()
+    type = EventType.ARRIVAL
 
 
 class ServiceEnd(Event):
+    __slots__ = ('service',)
+    type = EventType.SERVICE_END
+
     def __init__(self, service: Service, time: float) -> None:
-        super().__init__("Service End", time)
+        self.time = time
+        self.cancelled = False
         self.service = service
 
 
-class EventHeap:
+class Renege(Event):
+    __slots__ = ('customer',)
+    type = EventType.RENEGE
+
+    def __init__(self, customer: int, time: float) -> None:
+        self.time = time
+        self.cancelled = False
+        self.customer = customer
+
+
+class Warmup(Event):
+    __slots__ = ()
+    type = EventType.WARMUP
+
+
+class EventList(ABC):
     def __init__(self) -> None:
-        self.idx_of_events: dict[Event, int] = {}
-        self.heap: list[Event] = []
+        self.counter = count()
+        self.size = 0
+        self.no_of_cancelled = 0
 
     def __repr__(self) -> str:
+        events = [entry[2] for entry in self.entries() if not entry[2].cancelled]
         extra = ""
-        if len(self.heap) == 6:
+        if len(events) == 6:
             extra = " <- [1 Event]"
-        elif len(self.heap) > 6:
-            extra = f" <- [{len(self.heap) - 5} Events]"
-        return " <- ".join([str(event) for event in self.heap[:5]])+extra
+        elif len(events) > 6:
+            extra = f" <- [{len(events) - 5} Events]"
+        return " <- ".join([str(event) for event in events[:5]])+extra
+
+    def __len__(self) -> int:
+        return self.size - self.no_of_cancelled
+
+    @abstractmethod
+    def entries(self) -> list[tuple[float, int, Event]]:
+        ...
+
+    @abstractmethod
+    def push_entry(self, entry: tuple[float, int, Event]) -> None:
+        ...
+
+    @abstractmethod
+    def pop_entry(self) -> tuple[float, int, Event]:
+        ...
+
+    @abstractmethod
+    def peek_entry(self) -> tuple[float, int, Event]:
+        ...
 
     def add(self, event: Event) -> None:
-        new_event = event
-        self.heap.append(new_event)
-        self.idx_of_events[new_event] = len(self.heap) - 1
-        self.sift_up(len(self.heap) - 1)
+        self.push_entry((event.time, next(self.counter), event))
+        self.size += 1
 
     def build_heap(self, array: list) -> None:
-        last_idx = len(array) - 1
-        start_from = self.get_parent_idx(last_idx)
-        heap = []
-        for idx, time in enumerate(array):
-            event = Arrival(time)
-            self.idx_of_events[event] = idx
-            heap.append(event)
-        for i in range(start_from, -1, -1):
-            self.sift_down(i, heap)
-        self.heap = heap
+        for time in array:
+            self.add(Arrival(time))
 
     def pop(self) -> Event:
-        self.heap[0], self.heap[-1] = self.heap[-1], self.heap[0]
-        self.idx_of_events[self.heap[0]], self.idx_of_events[self.heap[-1]] = (
-            self.idx_of_events[self.heap[-1]],
-            self.idx_of_events[self.heap[0]],
-        )
-        x = self.heap.pop()
-        del self.idx_of_events[x]
-        self.sift_down(0, self.heap)
-        return x
+        while True:
+            event = self.pop_entry()[2]
+            self.size -= 1
+            if not event.cancelled:
+                return event
+            self.no_of_cancelled -= 1
 
     def peek(self) -> Event:
-        return self.heap[0]
+        event = self.peek_entry()[2]
+        while event.cancelled:
+            self.pop_entry()
+            self.size -= 1
+            self.no_of_cancelled -= 1
+            event = self.peek_entry()[2]
+        return event
+
+    def cancel(self, event: Event) -> None:
+        event.cancelled = True
+        self.no_of_cancelled += 1
 
     def is_empty(self) -> bool:
-        return len(self.heap) == 0
+        return len(self) == 0
 
-    def get_parent_idx(self, idx: int) -> int:
-        return (idx - 1) // 2
 
-    def get_left_child_idx(self, idx: int) -> int:
-        return idx * 2 + 1
+class EventHeap(EventList):
+    def __init__(self) -> None:
+        super().__init__()
+        self.heap: list[tuple[float, int, Event]] = []
 
-    def get_right_child_idx(self, idx: int) -> int:
-        return idx * 2 + 2
+    def entries(self) -> list[tuple[float, int, Event]]:
+        return self.heap
 
-    def sift_down(self, idx: int, array: list) -> None:
-        while True:
-            left = self.get_left_child_idx(idx)
-            right = self.get_right_child_idx(idx)
-
-            smallest = idx
-            if left < len(array) and array[left] < array[idx]:
-                smallest = left
-            if right < len(array) and array[right] < array[smallest]:
-                smallest = right
-
-            if smallest != idx:
-                array[idx], array[smallest] = array[smallest], array[idx]
-                (
-                    self.idx_of_events[array[idx]],
-                    self.idx_of_events[array[smallest]],
-                ) = (
-                    self.idx_of_events[array[smallest]],
-                    self.idx_of_events[array[idx]],
-                )
-                idx = smallest
-            else:
-                break
-
-    def sift_up(self, idx: int) -> None:
-        p = self.get_parent_idx(idx)
-        while p >= 0 and self.heap[p] > self.heap[idx]:
-            self.heap[p], self.heap[idx] = self.heap[idx], self.heap[p]
-            self.idx_of_events[self.heap[p]], self.idx_of_events[self.heap[idx]] = (
-                self.idx_of_events[self.heap[idx]],
-                self.idx_of_events[self.heap[p]],
-            )
-            idx = p
-            p = self.get_parent_idx(idx)
+    def push_entry(self, entry: tuple[float, int, Event]) -> None:
+        heappush(self.heap, entry)
+
+    def pop_entry(self) -> tuple[float, int, Event]:
+        return heappop(self.heap)
+
+    def peek_entry(self) -> tuple[float, int, Event]:
+        return self.heap[0]
+
+    def build_heap(self, array: list) -> None:
+        self.heap.extend((time, next(self.counter), Arrival(time)) for time in array)
+        heapify(self.heap)
+        self.size = len(self.heap)
+
+
+class CalendarQueue(EventList):
+    SAMPLE_SIZE = 25
+
+    def __init__(self, no_of_buckets: int = 2, bucket_width: float = 1.0) -> None:
+        super().__init__()
+        self.setup(no_of_buckets, bucket_width, 0.0)
+
+    def setup(self, no_of_buckets: int, bucket_width: float, start: float) -> None:
+        self.buckets: list[list[tuple[float, int, Event]]] = [[] for _ in range(no_of_buckets)]
+        self.bucket_width = bucket_width
+        self.last_time = start
+        self.bucket_no = int(start/bucket_width)
+
+    def entries(self) -> list[tuple[float, int, Event]]:
+        return sorted(entry for bucket in self.buckets for entry in bucket)
+
+    def push_entry(self, entry: tuple[float, int, Event]) -> None:
+        if entry[0] < self.last_time:
+            self.last_time = entry[0]
+            self.bucket_no = int(entry[0]/self.bucket_width)
+        insort(self.buckets[int(entry[0]/self.bucket_width) % len(self.buckets)], entry)
+        if self.size+1 > 2*len(self.buckets):
+            self.resize(2*len(self.buckets))
+
+    def locate(self) -> int:
+        bucket_no = self.bucket_no
+        for _ in range(len(self.buckets)):
+            bucket = self.buckets[bucket_no % len(self.buckets)]
+            if bucket and int(bucket[0][0]/self.bucket_width) <= bucket_no:
+                return bucket_no
+            bucket_no += 1
+        return int(min(bucket[0] for bucket in self.buckets if bucket)[0]/self.bucket_width)
+
+    def pop_entry(self) -> tuple[float, int, Event]:
+        self.bucket_no = self.locate()
+        entry = self.buckets[self.bucket_no % len(self.buckets)].pop(0)
+        self.last_time = entry[0]
+        if self.size-1 < len(self.buckets)//2 and len(self.buckets) > 2:
+            self.resize(len(self.buckets)//2)
+        return entry
+
+    def peek_entry(self) -> tuple[float, int, Event]:
+        return self.buckets[self.locate() % len(self.buckets)][0]
+
+    def resize(self, no_of_buckets: int) -> None:
+        entries = self.entries()
+        head = [entry[0] for entry in entries[:self.SAMPLE_SIZE]]
+        separations = [b-a for a, b in zip(head, head[1:])]
+        width = self.bucket_width
+        if sum(separations) > 0:
+            average = sum(separations)/len(separations)
+            close = [separation for separation in separations if separation <= 2*average]
+            width = 3*sum(close)/len(close) if sum(close) > 0 else 3*average
+        self.setup(no_of_buckets, width, self.last_time)
+        for entry in entries:
+            insort(self.buckets[int(entry[0]/self.bucket_width) % len(self.buckets)], entry)
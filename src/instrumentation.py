@@ -0,0 +1,126 @@
+from __future__ import annotations
+from time import perf_counter
+from typing import Callable, TYPE_CHECKING
+import json
+if TYPE_CHECKING:
+    from src.simulation import Simulation
+    from src.event import Event, EventType
+
+
+class Counter:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.seconds: float = 0.0
+
+    def add(self, seconds: float, n: int = 1) -> None:
+        self.count += n
+        self.seconds += seconds
+
+    def report(self) -> dict[str, float]:
+        return {
+            'count': self.count,
+            'seconds': self.seconds,
+            'microseconds_per_call': self.seconds/self.count*1e6 if self.count else 0
+        }
+
+
+class Instrumentation:
+    SAMPLERS = {
+        'arrival': ('arrival_distribution',),
+        'arrival_batch': ('arrival_batch_distribution',),
+        'service': ('system', 'service_center', 'service_distribution'),
+        'priority_service': ('system', 'service_center', 'priority_service_distribution'),
+        'service_batch': ('system', 'service_center', 'service_batch_distribution'),
+    }
+
+    def __init__(self, simulation: Simulation) -> None:
+        self.simulation = simulation
+        self.events: dict[EventType, Counter] = {}
+        self.regular_updates = Counter()
+        self.draws: dict[str, Counter] = {}
+        self.wall_time: float = 0.0
+        self.max_event_list_size: int = 0
+        self.max_length_of_queue: int = 0
+        self.attach()
+
+    def attach(self) -> None:
+        simulation = self.simulation
+        simulation.event_manager = self.timed_event_manager(simulation.event_manager)
+        simulation.update_manager = self.timed_update_manager(simulation.update_manager)
+        simulation.advance = self.timed_advance(simulation.advance)
+        for name, path in self.SAMPLERS.items():
+            owner = simulation
+            for attribute in path[:-1]:
+                owner = getattr(owner, attribute)
+            draw = getattr(owner, path[-1])
+            if draw is not None:
+                self.draws[name] = Counter()
+                setattr(owner, path[-1], self.timed_draw(draw, self.draws[name]))
+
+    def timed_event_manager(self, event_manager: Callable[[Event], None]) -> Callable[[Event], None]:
+        events, queue = self.simulation.events, self.simulation.system.queue
+
+        def wrapper(event: Event) -> None:
+            self.max_event_list_size = max(self.max_event_list_size, len(events)+1)
+            start = perf_counter()
+            event_manager(event)
+            elapsed = perf_counter()-start
+            counter = self.events.get(event.type)
+            if counter is None:
+                counter = self.events[event.type] = Counter()
+            counter.add(elapsed)
+            self.max_length_of_queue = max(self.max_length_of_queue, len(queue))
+        return wrapper
+
+    def timed_update_manager(self, update_manager: Callable[[float], None]) -> Callable[[float], None]:
+        simulation = self.simulation
+
+        def wrapper(turn_over_time: float) -> None:
+            before = simulation.time
+            start = perf_counter()
+            update_manager(turn_over_time)
+            elapsed = perf_counter()-start
+            self.regular_updates.add(elapsed, round((simulation.time-before)/simulation.TIME_UPDATE_UNIT))
+        return wrapper
+
+    def timed_advance(self, advance: Callable[[float], None]) -> Callable[[float], None]:
+        def wrapper(until: float) -> None:
+            start = perf_counter()
+            advance(until)
+            self.wall_time += perf_counter()-start
+        return wrapper
+
+    @staticmethod
+    def timed_draw(draw: Callable[[], float], counter: Counter) -> Callable[[], float]:
+        def wrapper() -> float:
+            start = perf_counter()
+            value = draw()
+            counter.add(perf_counter()-start)
+            return value
+        return wrapper
+
+    @property
+    def no_of_events(self) -> int:
+        return sum(counter.count for counter in self.events.values())
+
+    @property
+    def events_per_second(self) -> float:
+        return self.no_of_events/self.wall_time if self.wall_time else 0
+
+    def report(self) -> dict:
+        return {
+            'wall_time': self.wall_time,
+            'no_of_events': self.no_of_events,
+            'events_per_second': self.events_per_second,
+            'events': {event_type.label: counter.report() for event_type, counter in self.events.items()},
+            'regular_updates': self.regular_updates.report(),
+            'draws': {name: counter.report() for name, counter in self.draws.items()},
+            'max_event_list_size': self.max_event_list_size,
+            'max_length_of_queue': self.max_length_of_queue,
+        }
+
+    def export(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
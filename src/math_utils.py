@@ -1,45 +1,257 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
 import numpy as np
-import scipy.stats as sc
+import math
+import os
 import re
-from . import PRECISION
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, Union
+from src.random_stream import RandomStream, default_stream
 
 
-def distribution(dist: str, precision: int, is_integer: bool = False) -> float:
+TABLE_CACHE_SIZE = 64
+TAIL_WIDTH = 10
+TRACE_EXTENSIONS = ('.npy', '.csv', '.txt')
+
+Source = Union[str, np.ndarray, Iterable]
+
+
+class Distribution(ABC):
+    def __init__(self, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        self.precision = precision
+        self.stream = stream
+        self.is_integer = is_integer
+
+    @abstractmethod
+    def __call__(self) -> float:
+        ...
+
+    @abstractmethod
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        ...
+
+
+class Constant(Distribution):
+    def __init__(self, c: float, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.value = round(c, precision)
+
+    def __call__(self) -> float:
+        return self.value
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return np.full(shape, self.value)
+
+
+class DiscreteUniform(Distribution):
+    def __init__(self, a: int, b: int, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.a = a
+        self.b = b
+
+    def __call__(self) -> float:
+        return round(self.a+self.stream.integer(self.b-self.a+1), self.precision)
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return self.a+np.floor(self.stream.generator.random(shape)*(self.b-self.a+1))
+
+
+class ContinuousUniform(Distribution):
+    def __init__(self, a: float, b: float, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.a = a
+        self.b = b
+
+    def __call__(self) -> float:
+        return round(self.stream.uniform()*(self.b-self.a)+self.a, self.precision)
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return np.round(self.stream.generator.random(shape)*(self.b-self.a)+self.a, self.precision)
+
+
+class AliasTable:
+    def __init__(self, values: np.ndarray, probabilities: np.ndarray) -> None:
+        self.n = len(probabilities)
+        scaled = (probabilities*self.n/probabilities.sum()).tolist()
+        probability = [1.0]*self.n
+        alias = list(range(self.n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            probability[s] = scaled[s]
+            alias[s] = g
+            scaled[g] += scaled[s]-1
+            (small if scaled[g] < 1 else large).append(g)
+        self.values: list[float] = values.tolist()
+        self.probability = probability
+        self.alias = alias
+
+    def __len__(self) -> int:
+        return self.n
+
+    def pmf(self) -> np.ndarray:
+        probability = np.array(self.probability)
+        pmf = probability/self.n
+        np.add.at(pmf, self.alias, (1-probability)/self.n)
+        return pmf
+
+    def sample(self, u: float) -> float:
+        x = u*self.n
+        i = int(x)
+        return self.values[i] if x-i < self.probability[i] else self.values[self.alias[i]]
+
+    def sample_block(self, u: np.ndarray) -> np.ndarray:
+        x = u*self.n
+        i = x.astype(np.int64)
+        j = np.where(x-i < np.take(self.probability, i), i, np.take(self.alias, i))
+        return np.take(self.values, j)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def normal_table(m: float, s: float, precision: int, is_integer: bool) -> AliasTable:
+    import scipy.stats as sc
+    first, step = (1, 1) if is_integer else (10**(-precision), 10**(-precision))
+    lowest = max(0, int(np.floor((m-TAIL_WIDTH*s-first)/step)))
+    highest = max(lowest, int(np.ceil((m+TAIL_WIDTH*s-first)/step)))
+    centers = first+step*np.arange(lowest, highest+1)
+    probabilities = sc.norm.sf(centers-step/2, loc=m, scale=s) - sc.norm.sf(centers+step/2, loc=m, scale=s)
+    support = probabilities > 0
+    if not support.any():
+        raise ValueError(f"Normal({m}, {s}) has no positive values to draw from")
+    return AliasTable(np.round(centers[support], precision), probabilities[support])
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def poisson_table(p: float, precision: int) -> AliasTable:
+    import scipy.stats as sc
+    lowest = max(1, int(p-TAIL_WIDTH*(np.sqrt(p)+1)))
+    highest = int(p+TAIL_WIDTH*(np.sqrt(p)+1))+1
+    n = np.arange(lowest, highest+1)
+    probabilities = sc.poisson.pmf(n, p)
+    support = probabilities > 0
+    if not support.any():
+        raise ValueError(f"Poisson({p}) has no positive values to draw from")
+    return AliasTable(np.round(n[support], precision), probabilities[support])
+
+
+class Normal(Distribution):
+    def __init__(self, m: float, s: float, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.m = m
+        self.s = s
+        self.table = normal_table(m, s, precision, is_integer)
+
+    def __call__(self) -> float:
+        return self.table.sample(self.stream.uniform())
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return self.table.sample_block(self.stream.generator.random(shape))
+
+
+class Poisson(Distribution):
+    def __init__(self, p: float, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.p = p
+        self.table = poisson_table(p, precision)
+
+    def __call__(self) -> float:
+        return self.table.sample(self.stream.uniform())
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return self.table.sample_block(self.stream.generator.random(shape))
+
+
+class Exponential(Distribution):
+    def __init__(self, scale: float, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.scale = scale
+
+    def __call__(self) -> float:
+        return round(self.scale*self.stream.exponential(), self.precision)
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return np.round(self.scale*self.stream.generator.standard_exponential(shape), self.precision)
+
+
+class Replay(Distribution):
+    CHUNK_SIZE = 65536
+
+    def __init__(self, source: Source, precision: int, stream: RandomStream, is_integer: bool = False) -> None:
+        super().__init__(precision, stream, is_integer)
+        self.chunks = self.read(source)
+        self.values: list[float] = []
+
+    @classmethod
+    def read(cls, source: Source) -> Iterator[np.ndarray]:
+        if isinstance(source, str):
+            if source.endswith('.npy'):
+                source = np.load(source, mmap_mode='r')
+            else:
+                return cls.read_text(source)
+        if isinstance(source, np.ndarray):
+            source = source.ravel()
+            return (source[i:i+cls.CHUNK_SIZE] for i in range(0, len(source), cls.CHUNK_SIZE))
+        return (np.asarray(chunk, dtype=float).ravel() for chunk in source)
+
+    @classmethod
+    def read_text(cls, path: str) -> Iterator[np.ndarray]:
+        with open(path) as file:
+            while lines := list(islice(file, cls.CHUNK_SIZE)):
+                values = []
+                for line in lines:
+                    try:
+                        values.append(float(line.split(',')[0]))
+                    except ValueError:
+                        continue
+                yield np.array(values)
+
+    def __call__(self) -> float:
+        while not self.values:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return math.inf
+            self.values = np.round(chunk[::-1], self.precision).tolist()
+        return self.values.pop()
+
+    def block(self, shape: int | tuple[int, ...]) -> np.ndarray:
+        return np.array([self() for _ in range(int(np.prod(shape)))]).reshape(shape)
+
+
+def sampler(dist: Source, precision: int, stream: RandomStream, is_integer: bool = False) -> Distribution:
+    if not isinstance(dist, str) or os.path.splitext(dist)[1] in TRACE_EXTENSIONS:
+        return Replay(dist, precision, stream, is_integer)
     if bool(re.fullmatch(r"Constant\(\d+(\.\d+)?\)", dist)):
-        return round(float(re.search(r"\d+\.?\d*", dist).group()), precision)
+        return Constant(float(re.search(r"\d+\.?\d*", dist).group()), precision, stream, is_integer)
     elif bool(re.fullmatch(r"Discrete Uniform\(\d+(\.\d+)?, \d+(\.\d+)?\)", dist)):
         a, b = map(int, re.findall(r"\d+\.?\d*", dist))
-        return round(np.random.randint(a, b+1), precision)
+        return DiscreteUniform(a, b, precision, stream, is_integer)
     elif bool(re.fullmatch(r"Continuous Uniform\(\d+(\.\d+)?, \d+(\.\d+)?\)", dist)):
         a, b = map(float, re.findall(r"\d+\.?\d*", dist))
-        return round(np.random.random()*(b-a)+a, precision)
+        return ContinuousUniform(a, b, precision, stream, is_integer)
     elif bool(re.fullmatch(r"Normal\(-?\d+(\.\d+)?, \d+(\.\d+)?\)", dist)):
         m, s = map(float, re.findall(r"-?\d+\.?\d*", dist))
-        n, h = (1, 0.5) if is_integer else (10**(-precision), 5*10**(-precision-1))
-        Px = 1
-        denominator = sc.norm.sf(n-h, loc=m, scale=s)
-        probabilities = []
-        while Px/denominator > 0:
-            Px = sc.norm.cdf(n+h, loc=m, scale=s) - sc.norm.cdf(n-h, loc=m, scale=s)
-            probabilities.append(Px/denominator)
-            n = round(n+2*h, precision)
-        return round(
-            np.random.choice(np.arange(1 if is_integer else 10**(-precision), n, round(2*h, precision)), p=probabilities),
-            precision
-        )
+        return Normal(m, s, precision, stream, is_integer)
     elif bool(re.fullmatch(r"Poisson\(\d+(\.\d+)?\)", dist)):
-        p = float(re.search(r"\d+\.?\d*", dist).group())
-        n = 1
-        Px = 1
-        denominator = sc.poisson.sf(0, p)
-        probabilities = []
-        while Px/denominator > 0:
-            Px = sc.poisson.pmf(n, p)
-            probabilities.append(Px/denominator)
-            n += 1
-        return round(np.random.choice(np.arange(1, n, 1), p=probabilities), precision)
+        return Poisson(float(re.search(r"\d+\.?\d*", dist).group()), precision, stream, is_integer)
     elif bool(re.fullmatch(r"Exponential\(\d+(\.\d+)?\)", dist)):
-        return round(np.random.exponential(float(re.search(r"\d+\.?\d*", dist).group())), precision)
+        return Exponential(float(re.search(r"\d+\.?\d*", dist).group()), precision, stream, is_integer)
+    raise ValueError(f"unknown distribution: {dist}")
+
+
+def optional_sampler(
+    dist: Source | None, precision: int, stream: RandomStream, is_integer: bool = False
+) -> Distribution | None:
+    return None if dist is None else sampler(dist, precision, stream, is_integer)
+
+
+def distribution(dist: str, precision: int, is_integer: bool = False, stream: RandomStream = default_stream) -> float:
+    return sampler(dist, precision, stream, is_integer)()
+
+
+def batch_size(value: float, precision: int) -> int:
+    return int(round(value, precision)) if math.isfinite(value) else 1
 
 
 def make_str(distribution: str, param1: float, param2: float) -> str:
@@ -50,9 +262,5 @@ def logistic(x: float, start: float, half: float, stop: float) -> float:
     return 1 if x <= start else 2/(1+np.e**(np.log(3)*(min(stop, x)-start)/(half-start)))
 
 
-def update_function(old_stat: float, old_c: float, new_stat: float, new_c: float, denominator: float) -> float:
-    return round((old_stat*old_c+new_stat*new_c)/denominator, PRECISION)
-
-
-def boolean_function(occurring_probability: float) -> bool:
-    return bool(np.random.choice(2, p=[1-occurring_probability, occurring_probability]))
+def boolean_function(occurring_probability: float, stream: RandomStream = default_stream) -> bool:
+    return stream.bernoulli(occurring_probability)
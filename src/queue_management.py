@@ -1,16 +1,80 @@
 from __future__ import annotations
+from bisect import bisect_left
+import sys
+from collections import deque
 import numpy as np
 from . import PRECISION
-from src.math_utils import update_function, boolean_function, logistic
-from typing import Iterator, TYPE_CHECKING
+from src.math_utils import boolean_function, logistic
+from src.accumulators import TimeWeightedAverage, Welford, copy_state, remove_state
+from src.event import Renege
+from typing import Any, Iterator, Sequence, TYPE_CHECKING
 if TYPE_CHECKING:
-    from src.simulation import Customer
+    from src.customer_store import CustomerStore
+    from src.random_stream import RandomStream
+    from src.event import EventList
+
+
+class CustomerLine:
+    def __init__(self, discipline: str, stream: RandomStream) -> None:
+        self.discipline = discipline
+        self.random = stream
+        self.order: deque[int] = deque()
+        self.members: list[int] = []
+        self.position: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.members)
+
+    def __contains__(self, customer: int) -> bool:
+        return customer in self.position
+
+    def append(self, customer: int) -> None:
+        self.position[customer] = len(self.members)
+        self.members.append(customer)
+        if self.discipline != 'SIRO':
+            self.order.append(customer)
+
+    def pop(self) -> int:
+        match self.discipline:
+            case 'FIFO':
+                customer = self.order.popleft()
+                while customer not in self.position:
+                    customer = self.order.popleft()
+            case 'LIFO':
+                customer = self.order.pop()
+                while customer not in self.position:
+                    customer = self.order.pop()
+            case 'SIRO':
+                customer = self.members[self.random.integer(len(self.members))]
+        self.remove(customer)
+        return customer
+
+    def pop_random(self) -> int:
+        customer = self.members[self.random.integer(len(self.members))]
+        self.remove(customer)
+        return customer
+
+    def remove(self, customer: int) -> None:
+        i = self.position.pop(customer)
+        last = self.members.pop()
+        if last != customer:
+            self.members[i] = last
+            self.position[last] = i
+        if len(self.order) > 2*len(self.members)+32:
+            self.order = deque(customer for customer in self.order if customer in self.position)
 
 
 class Queue:
+    COUNTERS = ('no_of_exited_customers', 'no_of_customers_delayed_longer_t_star', 'no_of_reneging')
+    ACCUMULATORS = ('no_of_customers', 'time_spent_per_customer', 'queue_contains_more_k_star_customers')
+
     def __init__(
         self,
-        queue_capacity: int,
+        event_heap: EventList,
+        queue_capacity: int | None,
         server_select_rand_probability: float,
         renege: bool,
         renege_start: int,
@@ -18,8 +82,12 @@ class Queue:
         renege_stop: int,
         t_star: int,
         k_star: int,
-        discipline: str
+        discipline: str,
+        time_update_unit: float,
+        stream: RandomStream,
+        customers: CustomerStore
     ) -> None:
+        self.events = event_heap
         self.queue_capacity = queue_capacity
         self.server_select_rand_probability = server_select_rand_probability
         self.renege = renege
@@ -29,17 +97,34 @@ class Queue:
         self.t_star = t_star
         self.k_star = k_star
         self.discipline = discipline
+        self.time_update_unit = time_update_unit
+        self.random = stream
+        self.customers = customers
 
         self.no_of_exited_customers: int = 0
-        self.average_no_of_customers: float = 0
-        self.average_time_spent_per_customer: float = 0
+        self.no_of_customers = TimeWeightedAverage()
+        self.time_spent_per_customer = Welford()
         self.no_of_customers_delayed_longer_t_star: int = 0
-        self.total_time_queue_contains_more_k_star_customers: float = 0
+        self.queue_contains_more_k_star_customers = TimeWeightedAverage(value=k_star <= 0)
         self.no_of_reneging: int = 0
 
-        self.last_data: dict[str, int | float] = {'time': 0, 'number': 0}
-        self.regular_queue: list[Customer] = []
-        self.priority_queue: list[Customer] = []
+        self.regular_queue = CustomerLine(discipline, stream)
+        self.priority_queue = CustomerLine('FIFO', stream)
+        self.renege_events: dict[int, Renege] = {}
+        if renege:
+            self.renege_survival = self.survival_table()
+
+    @property
+    def average_no_of_customers(self) -> float:
+        return round(self.no_of_customers.mean, PRECISION)
+
+    @property
+    def average_time_spent_per_customer(self) -> float:
+        return round(self.time_spent_per_customer.mean, PRECISION)
+
+    @property
+    def total_time_queue_contains_more_k_star_customers(self) -> float:
+        return round(self.queue_contains_more_k_star_customers.area, PRECISION)
 
     @property
     def proportion_of_customers_delayed_longer_t_star(self) -> float:
@@ -49,9 +134,7 @@ class Queue:
 
     @property
     def proportion_of_time_queue_contains_more_k_star_customers(self) -> float:
-        if self.last_data['time'] == 0:
-            return 0
-        return round(self.total_time_queue_contains_more_k_star_customers/self.last_data['time'], PRECISION)
+        return round(self.queue_contains_more_k_star_customers.mean, PRECISION)
 
     @property
     def proportion_of_reneging(self) -> float:
@@ -62,101 +145,107 @@ class Queue:
     def __len__(self) -> int:
         return len(self.regular_queue)+len(self.priority_queue)
 
-    def combine_queue(self) -> list[Customer]:
-        combination = self.regular_queue[:]
-        combination.extend(self.priority_queue)
-        return combination
+    def combine_queue(self) -> list[int]:
+        return [*self.regular_queue, *self.priority_queue]
 
     def remaining_capacity(self) -> int:
+        if self.queue_capacity is None:
+            return sys.maxsize
         return self.queue_capacity-len(self) if not self.is_full() else 0
 
     def is_full(self) -> bool:
-        return len(self) == self.queue_capacity
+        return self.queue_capacity is not None and len(self) == self.queue_capacity
 
     def is_empty(self) -> bool:
         return len(self) == 0
 
     def is_next_service_random(self) -> bool:
-        return boolean_function(self.server_select_rand_probability)
-
-    def is_renege(self, delaying_time: float) -> bool:
-        probability = 1-logistic(delaying_time, self.renege_start, self.renege_half, self.renege_stop)
-        return boolean_function(probability)
-
-    def join(self, customers: list[Customer]) -> None:
+        return boolean_function(self.server_select_rand_probability, self.random)
+
+    def survival_table(self) -> list[float]:
+        checks = np.arange(1, int(np.ceil(self.renege_stop/self.time_update_unit))+1)*self.time_update_unit
+        staying = [logistic(check, self.renege_start, self.renege_half, self.renege_stop) for check in checks]
+        return [-survival for survival in np.cumprod(staying).tolist()]
+
+    def patience(self) -> float | None:
+        u = 1-self.random.uniform()
+        k = bisect_left(self.renege_survival, -u)
+        if k < len(self.renege_survival):
+            return (k+1)*self.time_update_unit
+        staying = logistic(self.renege_stop, self.renege_start, self.renege_half, self.renege_stop)
+        if staying >= 1:
+            return None
+        extra = int(np.ceil(np.log(u/-self.renege_survival[-1])/np.log(staying)))
+        return (len(self.renege_survival)+max(extra, 1))*self.time_update_unit
+
+    def schedule_renege(self, customer: int) -> None:
+        patience = self.patience()
+        if patience is not None:
+            event = Renege(customer, round(self.customers.arrival_time[customer]+patience, PRECISION))
+            self.renege_events[customer] = event
+            self.events.add(event)
+
+    def cancel_renege(self, customer: int) -> None:
+        event = self.renege_events.pop(customer, None)
+        if event is not None:
+            self.events.cancel(event)
+
+    def join(self, customers: Sequence[int]) -> None:
         for customer in customers:
-            if customer.priority:
+            if self.customers.priority[customer]:
                 self.priority_queue.append(customer)
             else:
-                match self.discipline:
-                    case 'FIFO':
-                        self.regular_queue.append(customer)
-                    case 'LIFO':
-                        self.regular_queue.insert(0, customer)
-                    case 'SIRO':
-                        i = np.random.randint(len(self.regular_queue)+1)
-                        self.regular_queue.insert(i, customer)
-        self.update_measures(situation='Regular', time=customers[0].arrival_time)
-
-    def pop(self, no_of_customers: int) -> Iterator[Customer]:
+                self.regular_queue.append(customer)
+                if self.renege:
+                    self.schedule_renege(customer)
+        self.update_regular(self.customers.arrival_time[customers[0]])
+
+    def pop(self, no_of_customers: int) -> Iterator[int]:
         for _ in range(no_of_customers):
             if self.is_next_service_random():
-                i = np.random.randint(len(self))
-                yield self.combine_queue().pop(i)
-            if self.priority_queue:
-                yield self.priority_queue.pop(0)
+                line = self.priority_queue if self.random.integer(len(self)) < len(self.priority_queue) \
+                    else self.regular_queue
+                customer = line.pop_random()
+            elif self.priority_queue:
+                customer = self.priority_queue.pop()
             else:
-                yield self.regular_queue.pop(0)
-
-    def update_measures(self, **kwargs) -> None:
-        match kwargs['situation']:
-            case 'Regular':
-                time = kwargs['time']
-                self.average_no_of_customers = update_function(
-                    self.average_no_of_customers,
-                    self.last_data['time'],
-                    self.last_data['number'],
-                    time-self.last_data['time'],
-                    time
-                )
-                self.total_time_queue_contains_more_k_star_customers = round(
-                    self.total_time_queue_contains_more_k_star_customers +
-                    time-self.last_data['time'] if self.k_star <= self.last_data['number'] else 0,
-                    PRECISION
-                )
-                if self.renege:
-                    self.reneging(time)
-                self.last_data['time'] = time
-                self.last_data['number'] = len(self)
-            case 'Pop':
-                arrival_time = kwargs['arrival_time']
-                exit_time = kwargs['exit_time']
-                self.average_time_spent_per_customer = update_function(
-                    self.average_time_spent_per_customer,
-                    self.no_of_exited_customers,
-                    exit_time-arrival_time,
-                    1,
-                    self.no_of_exited_customers+1
-                )
-                self.no_of_exited_customers += 1
-                self.no_of_customers_delayed_longer_t_star += 1 if self.t_star <= exit_time-arrival_time else 0
-            case 'Reneging':
-                self.no_of_reneging += 1
-            case 'Ending':
-                time = kwargs['time']
-                for i, customer in enumerate(self.combine_queue()):
-                    self.average_time_spent_per_customer = update_function(
-                        self.average_time_spent_per_customer,
-                        self.no_of_exited_customers+i,
-                        time - customer.arrival_time,
-                        1,
-                        self.no_of_exited_customers+i+1
-                    )
-                    self.no_of_customers_delayed_longer_t_star += 1 if self.t_star <= time-customer.arrival_time else 0
-
-    def reneging(self, time: float) -> None:
-        for customer in self.regular_queue:
-            if self.is_renege(time - customer.arrival_time):
-                self.regular_queue.remove(customer)
-                self.update_measures(situation='Reneging')
-                self.update_measures(situation='Pop', arrival_time=customer.arrival_time, exit_time=time)
+                customer = self.regular_queue.pop()
+            if self.renege_events:
+                self.cancel_renege(customer)
+            yield customer
+
+    def update_regular(self, time: float) -> None:
+        length = len(self)
+        self.no_of_customers.update(time, length)
+        self.queue_contains_more_k_star_customers.update(time, self.k_star <= length)
+
+    def update_pop(self, arrival_time: float, exit_time: float) -> None:
+        self.time_spent_per_customer.add(exit_time-arrival_time)
+        self.no_of_exited_customers += 1
+        self.no_of_customers_delayed_longer_t_star += 1 if self.t_star <= exit_time-arrival_time else 0
+
+    def update_ending(self, time: float) -> None:
+        for customer in self.combine_queue():
+            arrival_time = self.customers.arrival_time[customer]
+            self.time_spent_per_customer.add(time - arrival_time)
+            self.no_of_customers_delayed_longer_t_star += 1 if self.t_star <= time-arrival_time else 0
+
+    def reset_measures(self, time: float) -> None:
+        length = len(self)
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.no_of_customers = TimeWeightedAverage(time, length)
+        self.time_spent_per_customer = Welford()
+        self.queue_contains_more_k_star_customers = TimeWeightedAverage(time, self.k_star <= length)
+
+    def measures(self) -> dict[str, Any]:
+        return copy_state(self, self.COUNTERS, self.ACCUMULATORS)
+
+    def remove_measures(self, state: dict[str, Any]) -> None:
+        remove_state(self, state, self.COUNTERS, self.ACCUMULATORS)
+
+    def renege_customer(self, customer: int, time: float) -> None:
+        del self.renege_events[customer]
+        self.regular_queue.remove(customer)
+        self.no_of_reneging += 1
+        self.update_pop(self.customers.arrival_time[customer], time)
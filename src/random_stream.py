@@ -0,0 +1,30 @@
+from __future__ import annotations
+import numpy as np
+
+
+class RandomStream:
+    BLOCK_SIZE = 65536
+
+    def __init__(self, seed: int | np.random.SeedSequence | None = None) -> None:
+        self.generator = np.random.default_rng(seed)
+        self.uniforms: list[float] = []
+        self.exponentials: list[float] = []
+
+    def uniform(self) -> float:
+        if not self.uniforms:
+            self.uniforms = self.generator.random(self.BLOCK_SIZE).tolist()
+        return self.uniforms.pop()
+
+    def exponential(self) -> float:
+        if not self.exponentials:
+            self.exponentials = self.generator.standard_exponential(self.BLOCK_SIZE).tolist()
+        return self.exponentials.pop()
+
+    def integer(self, n: int) -> int:
+        return int(self.uniform()*n)
+
+    def bernoulli(self, p: float) -> bool:
+        return self.uniform() < p
+
+
+default_stream = RandomStream()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+from typing import Any
+import numpy as np
+from . import PRECISION
+from src.analytic import PLAIN_DEFAULTS, moments
+from src.math_utils import sampler
+from src.random_stream import RandomStream
+from src.simulation import Simulation
+
+
+CHUNK_ELEMENTS = 1 << 20
+TOLERANCE = 1e-9
+
+
+def is_eligible(config: dict[str, Any]) -> bool:
+    if any(config.get(key, default) != default for key, default in PLAIN_DEFAULTS.items()):
+        return False
+    speeds = config.get('server_speeds')
+    return (
+        config.get('discipline', 'FIFO') == 'FIFO'
+        and config.get('warmup') is None
+        and config.get('precision') is None
+        and config.get('trace') is None
+        and config['queue_capacity'] is None
+        and config['no_of_servers'] >= 1
+        and (speeds is None or len(set(speeds)) == 1)
+    )
+
+
+class Totals:
+    def __init__(self, no_of_replications: int, no_of_servers: int, k_star: int) -> None:
+        r, c = no_of_replications, no_of_servers
+        self.k_star = k_star
+        self.no_of_arrivals = np.zeros(r, dtype=np.int64)
+        self.no_of_queued = np.zeros(r, dtype=np.int64)
+        self.no_of_started = np.zeros(r, dtype=np.int64)
+        self.no_of_finished = np.zeros(r, dtype=np.int64)
+        self.no_of_exited_queue = np.zeros(r, dtype=np.int64)
+        self.no_of_unfinished_queue = np.zeros(r, dtype=np.int64)
+        self.no_of_delayed = np.zeros(r, dtype=np.int64)
+        self.system_area = np.zeros(r)
+        self.queue_area = np.zeros(r)
+        self.service_area = np.zeros(r)
+        self.served = np.zeros((r, c), dtype=np.int64)
+        self.unserved = np.zeros((r, c), dtype=np.int64)
+        self.service_time = np.zeros((r, c))
+        self.k_star_time = np.zeros(r)
+        self.queue_level = np.zeros(r, dtype=np.int64)
+        self.last_event = np.zeros(r)
+        self.pending_starts: list[np.ndarray] = [np.empty(0) for _ in range(r)]
+
+    def add(
+        self, arrival: np.ndarray, start: np.ndarray, end: np.ndarray, server: np.ndarray, duration: float,
+        t_star: float, last: bool
+    ) -> None:
+        valid = arrival <= duration
+        queued = valid & (start-arrival > TOLERANCE)
+        started = valid & (start <= duration)
+        finished = started & (end <= duration)
+        end_in_run = np.minimum(end, duration)
+        start_in_run = np.minimum(start, duration)
+        self.no_of_arrivals += valid.sum(1)
+        self.no_of_queued += queued.sum(1)
+        self.no_of_started += started.sum(1)
+        self.no_of_finished += finished.sum(1)
+        self.no_of_exited_queue += (queued & started).sum(1)
+        self.no_of_unfinished_queue += (valid & ~started).sum(1)
+        self.no_of_delayed += (queued & (t_star <= start_in_run-arrival)).sum(1)
+        self.system_area += np.where(valid, end_in_run-arrival, 0).sum(1)
+        self.queue_area += np.where(queued, start_in_run-arrival, 0).sum(1)
+        in_service = np.where(started, end_in_run-start, 0)
+        self.service_area += in_service.sum(1)
+        r, c = self.served.shape
+        slot = (np.arange(r)[:, None]*c+server).ravel()
+        np.add.at(self.served.reshape(-1), slot, finished.ravel())
+        np.add.at(self.unserved.reshape(-1), slot, (started & ~finished).ravel())
+        np.add.at(self.service_time.reshape(-1), slot, in_service.ravel())
+        self.add_queue_length(arrival, start, duration, last)
+
+    def add_queue_length(self, arrival: np.ndarray, start: np.ndarray, duration: float, last: bool) -> None:
+        for i in range(len(arrival)):
+            queued = start[i]-arrival[i] > TOLERANCE
+            window = duration if last else min(float(arrival[i, -1]), duration)
+            starts = np.concatenate([self.pending_starts[i], start[i][queued]])
+            later = starts > window
+            self.pending_starts[i] = starts[later]
+            times = np.concatenate([arrival[i][queued & (arrival[i] <= window)], starts[~later], [window]])
+            steps = np.concatenate([
+                np.ones(int((queued & (arrival[i] <= window)).sum()), dtype=np.int64),
+                -np.ones(int((~later).sum()), dtype=np.int64),
+                [0]
+            ])
+            order = np.argsort(times, kind='stable')
+            times, levels = times[order], self.queue_level[i]+np.cumsum(steps[order])
+            before = np.concatenate([[self.queue_level[i]], levels[:-1]])
+            gaps = np.diff(np.concatenate([[self.last_event[i]], times]))
+            self.k_star_time[i] += gaps[before >= self.k_star].sum()
+            self.queue_level[i], self.last_event[i] = levels[-1], window
+
+    def reports(self, duration: float) -> list[dict[str, float]]:
+        reports = []
+        for i in range(len(self.no_of_arrivals)):
+            n = int(self.no_of_arrivals[i])
+            served, unserved, service_time = self.served[i], self.unserved[i], self.service_time[i]
+            customers = served+unserved
+            per_server_time = np.divide(service_time, customers, out=np.zeros(len(customers)), where=customers != 0)
+            rate = np.divide(served, service_time, out=np.zeros(len(served)), where=service_time != 0)
+            skip = n-int(self.no_of_queued[i])
+            reports.append({
+                'all_time_no_of_customers': n,
+                'all_time_no_of_customers_system': n,
+                'average_no_of_customers_system': self.system_area[i]/duration,
+                'average_time_spent_per_customer_system': self.system_area[i]/n if n else 0,
+                'all_time_no_of_customers_queue': int(self.no_of_queued[i]),
+                'average_no_of_customers_queue': self.queue_area[i]/duration,
+                'average_time_spent_per_customer_queue':
+                    self.queue_area[i]/self.no_of_queued[i] if self.no_of_queued[i] else 0,
+                'all_time_no_of_customers_service_center': int(self.no_of_started[i]),
+                'average_no_of_customers_service_center': self.service_area[i]/duration,
+                'average_time_spent_per_customer_service_center':
+                    float(served @ per_server_time)/served.sum() if served.sum() else 0,
+                'no_of_finished_customers': int(self.no_of_finished[i]),
+                'no_of_unfinished_customers': n-int(self.no_of_finished[i]),
+                'no_of_unfinished_customers_queue': int(self.no_of_unfinished_queue[i]),
+                'no_of_unfinished_customers_service_center': int(unserved.sum()),
+                'no_of_customers_turned_away': 0,
+                'proportion_of_customers_turned_away': 0,
+                'no_of_bulking': 0,
+                'proportion_of_bulking': 0,
+                'no_of_reneging': 0,
+                'proportion_of_reneging': 0,
+                'no_of_customers_skip_queue': skip,
+                'proportion_of_customers_skip_queue': skip/n if n else 0,
+                'no_of_customers_delayed_longer_t_star': int(self.no_of_delayed[i]),
+                'proportion_of_customers_delayed_longer_t_star':
+                    self.no_of_delayed[i]/self.no_of_exited_queue[i] if self.no_of_exited_queue[i] else 0,
+                'total_time_queue_contains_more_k_star_customers': self.k_star_time[i],
+                'proportion_of_time_queue_contains_more_k_star_customers': self.k_star_time[i]/duration,
+                'no_of_arrivals': n,
+                'arrival_rate': n/duration,
+                'service_rate': float(rate.sum()),
+                'average_service_rate': float(served.sum()/service_time.sum()) if service_time.sum() else 0,
+                'average_server_utilization': float((service_time/duration).mean()),
+                'average_arrival_batch_size': 1 if n else 0,
+                'average_service_batch_size': 1 if customers.sum() else 0,
+            })
+        return [
+            {key: value if isinstance(value, int) else round(float(value), PRECISION) for key, value in report.items()}
+            for report in reports
+        ]
+
+
+def run(config: dict[str, Any], no_of_replications: int = 1, seed: int | None = None) -> list[dict[str, float]]:
+    if not is_eligible(config):
+        raise ValueError("the recurrence engine needs a plain G/G/c FIFO configuration with an unlimited queue")
+    precision, stream = Simulation.TIME_PRECISION, RandomStream(seed)
+    arrival_distribution = sampler(config['arrival_distribution'], precision, stream)
+    service_distribution = sampler(config['service_distribution'], precision, stream)
+    r, c, duration = no_of_replications, config['no_of_servers'], config['duration']
+    speed = (config.get('server_speeds') or [1])[0]
+    chunk = max(1024, CHUNK_ELEMENTS//r)
+    mean_interarrival = (moments(arrival_distribution) or (0, 0))[0]
+    if mean_interarrival > 0:
+        chunk = min(chunk, int(1.1*duration/mean_interarrival)+1024)
+
+    totals = Totals(r, c, config['k_star'])
+    last_arrival = np.zeros(r)
+    free = np.zeros((r, c))
+    rows = np.arange(r)
+    while True:
+        arrival = np.round(last_arrival[:, None]+np.cumsum(arrival_distribution.block((r, chunk)), axis=1), precision)
+        service = service_distribution.block((r, chunk))/speed
+        if c == 1:
+            before = np.cumsum(service, axis=1)-service
+            end = np.cumsum(service, axis=1)+np.maximum(
+                free[:, :1], np.maximum.accumulate(arrival-before, axis=1)
+            )
+            start = end-service
+            server = np.zeros((r, chunk), dtype=np.int64)
+            free[:, 0] = end[:, -1]
+        else:
+            start = np.empty((r, chunk))
+            server = np.empty((r, chunk), dtype=np.int64)
+            for j in range(chunk):
+                if arrival[:, j].min() > duration:
+                    start[:, j:], server[:, j:] = arrival[:, j:], 0
+                    break
+                i = free.argmin(1)
+                start[:, j] = np.maximum(arrival[:, j], free[rows, i])
+                free[rows, i] = start[:, j]+service[:, j]
+                server[:, j] = i
+            end = start+service
+        last_arrival = arrival[:, -1]
+        last = bool((last_arrival > duration).all())
+        totals.add(arrival, start, end, server, duration, config['t_star'], last)
+        if last:
+            return totals.reports(duration)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any
+import os
+import numpy as np
+from src.simulation import Simulation
+from src.event import EventHeap
+from src.recurrence import is_eligible, run
+from src.stopping import Estimate
+
+
+def trace_directory(directory: str, seed: np.random.SeedSequence) -> str:
+    return os.path.join(directory, 'run-'+'-'.join(f"{part:x}" for part in seed.spawn_key))
+
+
+def run_replication(config: dict[str, Any], seed: np.random.SeedSequence) -> dict[str, float]:
+    if config.get('trace') is not None:
+        config = {**config, 'trace': trace_directory(config['trace'], seed)}
+    simulation = Simulation(EventHeap(), **{**config, 'seed': seed})
+    simulation.run()
+    return simulation.report()
+
+
+def summarize(results: list[dict[str, float]], confidence: float = 0.95) -> dict[str, Estimate]:
+    return {key: Estimate([result[key] for result in results], confidence) for key in results[0]}
+
+
+def replicate(
+    config: dict[str, Any],
+    no_of_replications: int,
+    seed: int | None = None,
+    confidence: float = 0.95,
+    max_workers: int | None = None,
+    vectorized: bool = False
+) -> dict[str, Estimate]:
+    if vectorized and is_eligible(config):
+        return summarize(run(config, no_of_replications, seed), confidence)
+    seeds = np.random.SeedSequence(seed).spawn(no_of_replications)
+    if max_workers == 1:
+        results = list(map(run_replication, repeat(config), seeds))
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            results = list(executor.map(run_replication, repeat(config), seeds))
+    return summarize(results, confidence)
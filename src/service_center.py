@@ -1,53 +1,82 @@
 from __future__ import annotations
+from heapq import heapify, heappop, heappush
+import math
 import numpy as np
 from . import PRECISION
-from src.math_utils import distribution, logistic, update_function, boolean_function
+from src.math_utils import sampler, optional_sampler, logistic, boolean_function, batch_size
+from src.accumulators import TimeWeightedAverage
 from src.event import ServiceEnd
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Any, Literal, Sequence
 if TYPE_CHECKING:
-    from src.simulation import Customer
-    from src.event import EventHeap
+    from src.math_utils import Source
+    from src.customer_store import CustomerStore
+    from src.event import EventList
+    from src.random_stream import RandomStream
 
 
 class Server:
-    def __init__(self, server_id: int) -> None:
+    __slots__ = ('id', 'speed', 'status')
+
+    def __init__(self, server_id: int, speed: float = 1) -> None:
         self.id = server_id
+        self.speed = speed
         self.status: Literal['idle', 'busy'] = "idle"
-        self.no_of_served_customers: int = 0
-        self.no_of_unserved_customers: int = 0
-        self.average_time_spent_per_customer: float = 0
-        self.no_of_services: int = 0
-        self.no_of_unfinished_services: int = 0
-        self.total_service_time: float = 0
-        self.system_time: float = 0
 
-    @property
-    def service_rate(self) -> float:
-        if self.total_service_time == 0:
-            return 0
-        return round(self.no_of_served_customers/self.total_service_time, PRECISION)
+    def __repr__(self) -> str:
+        return f"{self.id}:{self.status}"
 
-    @property
-    def server_utilization(self) -> float:
-        if self.system_time == 0:
-            return 0
-        return round(self.total_service_time/self.system_time, PRECISION)
 
-    @property
-    def average_service_batch_size(self) -> float:
-        if (self.no_of_services+self.no_of_unfinished_services) == 0:
-            return 0
-        return round(
-            (self.no_of_served_customers+self.no_of_unserved_customers)/(self.no_of_services+self.no_of_unfinished_services),
-            PRECISION
+class ServerStatistics:
+    ARRAYS = (
+        'no_of_served_customers', 'no_of_unserved_customers', 'total_time_spent_by_customers', 'no_of_services',
+        'no_of_unfinished_services', 'total_service_time'
+    )
+
+    def __init__(self, no_of_servers: int) -> None:
+        self.no_of_served_customers = np.zeros(no_of_servers, dtype=np.int64)
+        self.no_of_unserved_customers = np.zeros(no_of_servers, dtype=np.int64)
+        self.total_time_spent_by_customers = np.zeros(no_of_servers)
+        self.no_of_services = np.zeros(no_of_servers, dtype=np.int64)
+        self.no_of_unfinished_services = np.zeros(no_of_servers, dtype=np.int64)
+        self.total_service_time = np.zeros(no_of_servers)
+
+    def copy(self) -> ServerStatistics:
+        copy = ServerStatistics(0)
+        for name in self.ARRAYS:
+            setattr(copy, name, getattr(self, name).copy())
+        return copy
+
+    def remove(self, earlier: ServerStatistics) -> None:
+        for name in self.ARRAYS:
+            setattr(self, name, getattr(self, name)-getattr(earlier, name))
+
+    @staticmethod
+    def ratio(numerator: np.ndarray, denominator: np.ndarray | float) -> np.ndarray:
+        numerator = np.asarray(numerator, dtype=float)
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=np.asarray(denominator) != 0)
+
+    def average_time_spent_per_customer(self) -> np.ndarray:
+        return self.ratio(
+            self.total_time_spent_by_customers, self.no_of_served_customers+self.no_of_unserved_customers
         )
 
-    def __repr__(self) -> str:
-        return f"{self.id}:{self.status}"
+    def service_rate(self) -> np.ndarray:
+        return self.ratio(self.no_of_served_customers, self.total_service_time)
+
+    def server_utilization(self, system_time: float) -> np.ndarray:
+        return self.ratio(self.total_service_time, system_time)
+
+    def average_service_batch_size(self) -> np.ndarray:
+        return self.ratio(
+            self.no_of_served_customers+self.no_of_unserved_customers,
+            self.no_of_services+self.no_of_unfinished_services
+        )
 
 
 class Service:
-    def __init__(self, start: float, end: float, server: Server, customer: list[Customer]) -> None:
+    __slots__ = ('start', 'end', 'server', 'customer')
+
+    def __init__(self, start: float, end: float, server: Server, customer: Sequence[int]) -> None:
         self.start = start
         self.end = end
         self.server = server
@@ -58,41 +87,89 @@ class Service:
 
 
 class ServerList:
-    def __init__(self, no_of_servers: int) -> None:
-        self.idle_servers: list[Server] = [Server(i) for i in range(no_of_servers)]
-        self.busy_servers: list[Server] = []
+    POLICIES = ('Random', 'Round Robin', 'Longest Idle', 'Least Utilized', 'Fastest')
 
-    def __repr__(self) -> str:
-        return str(self.combine_servers())
+    def __init__(
+        self, no_of_servers: int, stream: RandomStream, policy: str = 'Random', speeds: list[float] | None = None
+    ) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"unknown server assignment policy: {policy}")
+        self.random = stream
+        self.policy = policy
+        self.servers: list[Server] = [Server(i, 1 if speeds is None else speeds[i]) for i in range(no_of_servers)]
+        self.statistics = ServerStatistics(no_of_servers)
+        self.service_time_before_reset = np.zeros(no_of_servers)
+        self.no_of_idle: int = no_of_servers
+        self.cursor: int = 0
+        self.idle_servers: list[Server] = []
+        self.position: list[int] = []
+        self.idle_heap: list[tuple[float, int]] = []
+        if policy == 'Random':
+            self.idle_servers = self.servers[:]
+            self.position = list(range(no_of_servers))
+        else:
+            self.idle_heap = [(self.key(server, 0), server.id) for server in self.servers]
+            heapify(self.idle_heap)
 
-    def combine_servers(self) -> list[Server]:
-        combination = self.idle_servers[:]
-        combination.extend(self.busy_servers)
-        return combination
+    def __repr__(self) -> str:
+        return str(self.servers)
 
     def is_there_idle_server(self) -> bool:
-        return bool(self.idle_servers)
+        return self.no_of_idle > 0
+
+    def no_of_busy_servers(self) -> int:
+        return len(self.servers) - self.no_of_idle
+
+    def key(self, server: Server, time: float) -> float:
+        match self.policy:
+            case 'Round Robin':
+                return server.id + len(self.servers)*-((server.id-self.cursor)//len(self.servers))
+            case 'Longest Idle':
+                return time
+            case 'Least Utilized':
+                return self.service_time_before_reset[server.id]+self.statistics.total_service_time[server.id]
+            case 'Fastest':
+                return -server.speed
 
     def get_server(self) -> Server:
-        i = np.random.randint(len(self.idle_servers))
-        server = self.idle_servers.pop(i)
-        self.busy_servers.append(server)
+        if self.policy == 'Random':
+            server = self.idle_servers[self.random.integer(self.no_of_idle)]
+            last = self.idle_servers.pop()
+            if last is not server:
+                self.idle_servers[self.position[server.id]] = last
+                self.position[last.id] = self.position[server.id]
+        else:
+            key, i = heappop(self.idle_heap)
+            server = self.servers[i]
+            if self.policy == 'Round Robin':
+                self.cursor = key+1
+        self.no_of_idle -= 1
         server.status = "busy"
         return server
 
-    def make_idle(self, server: Server) -> None:
-        self.busy_servers.remove(server)
-        self.idle_servers.append(server)
+    def make_idle(self, server: Server, time: float) -> None:
+        if self.policy == 'Random':
+            self.position[server.id] = len(self.idle_servers)
+            self.idle_servers.append(server)
+        else:
+            heappush(self.idle_heap, (self.key(server, time), server.id))
+        self.no_of_idle += 1
         server.status = "idle"
 
+    def reset_statistics(self) -> None:
+        self.service_time_before_reset += self.statistics.total_service_time
+        self.statistics = ServerStatistics(len(self.servers))
+
 
 class ServiceCenter:
     def __init__(
         self,
-        event_heap: EventHeap,
+        event_heap: EventList,
         no_of_servers: int,
-        service_distribution: str,
-        priority_service_distribution: str,
+        server_policy: str,
+        server_speeds: list[float] | None,
+        service_distribution: Source,
+        priority_service_distribution: Source | None,
         service_batch_probability: float,
         service_batch_distribution: str,
         service_dependency: bool,
@@ -100,13 +177,19 @@ class ServiceCenter:
         service_dependency_half: int,
         service_dependency_stop: int,
         time_precision: int,
+        stream: RandomStream,
+        customers: CustomerStore
     ) -> None:
         self.events = event_heap
+        self.random = stream
+        self.customers = customers
         self.no_of_servers = no_of_servers
-        self.service_distribution = service_distribution
-        self.priority_service_distribution = priority_service_distribution
+        self.service_distribution = sampler(service_distribution, time_precision, stream)
+        self.priority_service_distribution = optional_sampler(priority_service_distribution, time_precision, stream)
         self.service_batch_probability = service_batch_probability
-        self.service_batch_distribution = service_batch_distribution
+        self.service_batch_distribution = optional_sampler(
+            service_batch_distribution, time_precision, stream, is_integer=True
+        )
         self.service_dependency = service_dependency
         self.service_dependency_start = service_dependency_start
         self.service_dependency_half = service_dependency_half
@@ -114,31 +197,42 @@ class ServiceCenter:
         self.time_precision = time_precision
 
         self.no_of_customers: int = 0
-        self.average_no_of_customers: float = 0
+        self.no_of_customers_over_time = TimeWeightedAverage()
+        self.system_time: float = 0
+        self.start_time: float = 0
 
-        self.last_data: dict[str, int | float] = {'time': 0, 'number': 0}
-        self.servers = ServerList(no_of_servers)
-        self.unfinished_services: list[Service] = []
+        self.servers = ServerList(no_of_servers, stream, server_policy, server_speeds)
+        self.unfinished_services: dict[Service, None] = {}
 
     @property
-    def average_time_spent_per_customer(self):
-        return self.average_among_servers('average_time_spent_per_customer', 'no_of_served_customers')
+    def average_no_of_customers(self) -> float:
+        return round(self.no_of_customers_over_time.mean, PRECISION)
 
     @property
-    def average_service_rate(self):
-        return self.average_among_servers('service_rate', 'total_service_time')
+    def average_time_spent_per_customer(self) -> float:
+        statistics = self.servers.statistics
+        return self.average_among_servers(
+            statistics.average_time_spent_per_customer(), statistics.no_of_served_customers
+        )
 
     @property
-    def service_rate(self):
-        return round(sum([server.service_rate for server in self.servers.combine_servers()]), PRECISION)
+    def average_service_rate(self) -> float:
+        statistics = self.servers.statistics
+        return self.average_among_servers(statistics.service_rate(), statistics.total_service_time)
 
     @property
-    def average_server_utilization(self):
-        return round(np.mean([server.server_utilization for server in self.servers.combine_servers()]), PRECISION)
+    def service_rate(self) -> float:
+        return round(float(self.servers.statistics.service_rate().sum()), PRECISION)
 
     @property
-    def average_service_batch_size(self):
-        return self.average_among_servers('average_service_batch_size', 'no_of_services')
+    def average_server_utilization(self) -> float:
+        utilization = self.servers.statistics.server_utilization(self.system_time-self.start_time)
+        return round(float(utilization.mean()), PRECISION)
+
+    @property
+    def average_service_batch_size(self) -> float:
+        statistics = self.servers.statistics
+        return self.average_among_servers(statistics.average_service_batch_size(), statistics.no_of_services)
 
     def __len__(self) -> int:
         return self.no_of_customers
@@ -147,16 +241,16 @@ class ServiceCenter:
         return not self.servers.is_there_idle_server()
 
     def remaining_capacity(self) -> int:
-        return len(self.servers.idle_servers)
+        return self.servers.no_of_idle
 
     def no_of_busy_servers(self) -> int:
-        return len(self.servers.busy_servers)
+        return self.servers.no_of_busy_servers()
 
     def is_service_batch(self) -> bool:
-        return boolean_function(self.service_batch_probability)
+        return boolean_function(self.service_batch_probability, self.random)
 
     def is_service_dependent(self) -> bool:
-        return boolean_function(self.service_dependency)
+        return boolean_function(self.service_dependency, self.random)
 
     def service_dependency_coefficient(self, length_of_queue: int) -> float:
         return logistic(
@@ -164,80 +258,80 @@ class ServiceCenter:
         )
 
     def no_of_customers_in_next_service(self) -> int:
-        return int(round(distribution(self.service_batch_distribution, self.time_precision, is_integer=True), PRECISION)) \
-            if self.is_service_batch() else 1
-
-    def average_among_servers(self, stat: str, coef: str) -> float:
-        numerator = 0
-        denominator = 0
-        for server in self.servers.combine_servers():
-            numerator += eval(f'server.{coef}*server.{stat}')
-            denominator += eval(f'server.{coef}')
+        return batch_size(self.service_batch_distribution(), PRECISION) if self.is_service_batch() else 1
+
+    def average_among_servers(self, stat: np.ndarray, coef: np.ndarray) -> float:
+        denominator = float(coef.sum())
         if denominator == 0:
             return 0
-        return round(numerator/denominator, PRECISION)
+        return round(float(np.dot(coef, stat))/denominator, PRECISION)
 
-    def initiate_service(self, customer: list[Customer], start_time: float, length_of_queue: int) -> None:
-        service_duration = distribution(
-            self.priority_service_distribution if customer[0].priority else self.service_distribution,
-            self.time_precision
-        )
+    def initiate_service(self, customer: Sequence[int], start_time: float, length_of_queue: int) -> Service:
+        service_duration = (
+            self.priority_service_distribution if self.customers.priority[customer[0]] else self.service_distribution
+        )()
         service_duration *= self.service_dependency_coefficient(length_of_queue) if self.is_service_dependent() else 1
-        service = Service(start_time, start_time+service_duration, self.servers.get_server(), customer)
-        self.unfinished_services.append(service)
-        self.events.add(ServiceEnd(service, service.end))
-        self.update_measures(situation='Service Initiation', customer_size=len(customer))
-        self.update_measures(situation='Regular', time=start_time)
+        server = self.servers.get_server()
+        service = Service(start_time, start_time+service_duration/server.speed, server, customer)
+        self.unfinished_services[service] = None
+        if math.isfinite(service.end):
+            self.events.add(ServiceEnd(service, service.end))
+        self.no_of_customers += len(customer)
+        self.update_regular(start_time)
+        return service
 
     def service_end(self, service: Service) -> None:
-        self.servers.make_idle(service.server)
-        self.unfinished_services.remove(service)
-        self.update_measures(situation='Service End', service=service)
-        self.update_measures(situation='Regular', time=service.end)
-
-    def update_measures(self, **kwargs) -> None:
-        match kwargs['situation']:
-            case 'Regular':
-                time = kwargs['time']
-                for server in self.servers.combine_servers():
-                    server.system_time = time
-                self.average_no_of_customers = update_function(
-                    self.average_no_of_customers,
-                    self.last_data['time'],
-                    self.last_data['number'],
-                    time-self.last_data['time'],
-                    time
-                )
-                self.last_data['time'] = time
-                self.last_data['number'] = len(self)
-            case 'Service Initiation':
-                self.no_of_customers += kwargs['customer_size']
-            case 'Service End':
-                service: Service = kwargs['service']
-                server = service.server
-                self.no_of_customers -= len(service.customer)
-                server.average_time_spent_per_customer = update_function(
-                    server.average_time_spent_per_customer,
-                    server.no_of_served_customers,
-                    service.end-service.start,
-                    len(service.customer),
-                    server.no_of_served_customers+len(service.customer)
-                )
-                server.no_of_served_customers += len(service.customer)
-                server.total_service_time = round(server.total_service_time+service.end-service.start, PRECISION)
-                server.no_of_services += 1
-            case 'Ending':
-                time = kwargs['time']
-                for service in self.unfinished_services:
-                    server = service.server
-                    server.average_time_spent_per_customer = update_function(
-                        server.average_time_spent_per_customer,
-                        server.no_of_served_customers+server.no_of_unserved_customers,
-                        time - service.start,
-                        len(service.customer),
-                        server.no_of_served_customers+server.no_of_unserved_customers+len(service.customer)
-                    )
-                    server.no_of_unserved_customers += len(service.customer)
-                    server.system_time = time
-                    server.total_service_time += round(server.total_service_time+time-service.start, PRECISION)
-                    server.no_of_unfinished_services += 1
+        del self.unfinished_services[service]
+        self.update_service_end(service)
+        self.servers.make_idle(service.server, service.end)
+        self.update_regular(service.end)
+
+    def update_regular(self, time: float) -> None:
+        self.system_time = time
+        self.no_of_customers_over_time.update(time, self.no_of_customers)
+
+    def update_service_end(self, service: Service) -> None:
+        statistics, i = self.servers.statistics, service.server.id
+        self.no_of_customers -= len(service.customer)
+        statistics.total_time_spent_by_customers[i] += (service.end-service.start)*len(service.customer)
+        statistics.no_of_served_customers[i] += len(service.customer)
+        statistics.total_service_time[i] += service.end-service.start
+        statistics.no_of_services[i] += 1
+
+    def update_ending(self, time: float) -> None:
+        statistics = self.servers.statistics
+        self.system_time = time
+        for service in self.unfinished_services:
+            i = service.server.id
+            statistics.total_time_spent_by_customers[i] += (time-service.start)*len(service.customer)
+            statistics.no_of_unserved_customers[i] += len(service.customer)
+            statistics.total_service_time[i] += time-service.start
+            statistics.no_of_unfinished_services[i] += 1
+
+    def reset_measures(self, time: float) -> None:
+        self.servers.reset_statistics()
+        statistics = self.servers.statistics
+        for service in self.unfinished_services:
+            i, elapsed = service.server.id, time-service.start
+            statistics.total_time_spent_by_customers[i] -= elapsed*len(service.customer)
+            statistics.total_service_time[i] -= elapsed
+            self.servers.service_time_before_reset[i] += elapsed
+        self.no_of_customers_over_time = TimeWeightedAverage(time, self.no_of_customers)
+        self.system_time = self.start_time = time
+
+    def measures(self) -> dict[str, Any]:
+        statistics = self.servers.statistics.copy()
+        for service in self.unfinished_services:
+            i, elapsed = service.server.id, max(0, self.system_time-service.start)
+            statistics.total_time_spent_by_customers[i] += elapsed*len(service.customer)
+            statistics.total_service_time[i] += elapsed
+        return {
+            'statistics': statistics,
+            'no_of_customers_over_time': self.no_of_customers_over_time.copy(),
+            'time': self.system_time
+        }
+
+    def remove_measures(self, state: dict[str, Any]) -> None:
+        self.servers.statistics.remove(state['statistics'])
+        self.no_of_customers_over_time.remove(state['no_of_customers_over_time'])
+        self.start_time = state['time']
@@ -1,50 +1,58 @@
+from __future__ import annotations
+from typing import Iterator
+import math
 import numpy as np
-from time import sleep
 from src.system import System
-from src.event import EventHeap, Arrival, Event
-from src.math_utils import distribution, boolean_function
-import logging
+from src.event import EventList, EventType, Arrival, Warmup, Event
+from src.math_utils import sampler, optional_sampler, boolean_function, batch_size, Source
+from src.random_stream import RandomStream
+from src.instrumentation import Instrumentation
+from src.trace import TraceRecorder
+from src.warmup import WarmupDetector
+from src.stopping import SequentialStop
 
 
-logging.basicConfig(
-    filename='file.log', filemode='w', level=logging.DEBUG,
-    format='%(asctime)s - %(filename)s - %(message)s', datefmt='%H:%M:%S'
-)
-
-
-class Customer:
-    ID = 0
-
-    def __init__(self, arrival_time: float, priority: bool) -> None:
-        self.id = self.get_id()
-        self.arrival_time = arrival_time
-        self.priority = priority
-
-    @classmethod
-    def get_id(cls):
-        cls.ID += 1
-        return cls.ID
+class Snapshot:
+    def __init__(
+        self,
+        time: float,
+        progress: float,
+        length_of_queue: int,
+        no_of_busy_servers: int,
+        average_no_of_customers_system: float,
+        average_time_spent_per_customer_system: float,
+        average_no_of_customers_queue: float,
+        average_time_spent_per_customer_queue: float
+    ) -> None:
+        self.time = time
+        self.progress = progress
+        self.length_of_queue = length_of_queue
+        self.no_of_busy_servers = no_of_busy_servers
+        self.average_no_of_customers_system = average_no_of_customers_system
+        self.average_time_spent_per_customer_system = average_time_spent_per_customer_system
+        self.average_no_of_customers_queue = average_no_of_customers_queue
+        self.average_time_spent_per_customer_queue = average_time_spent_per_customer_queue
 
     def __repr__(self) -> str:
-        return f"[ID:{self.id} - Arrival:{self.arrival_time} - Priority:{self.priority}]"
+        return f"[Time:{self.time} - Queue:{self.length_of_queue} - Busy Servers:{self.no_of_busy_servers}]"
 
 
 class Simulation:
     TIME_UPDATE_UNIT = 0.1
     TIME_PRECISION = 2
     INITIAL_NO_OF_ARRIVALS = 3
+    NO_OF_CHECKPOINTS = 1000
 
     def __init__(
         self,
-        event_heap: EventHeap,
-        queue_capacity: int,
+        event_heap: EventList,
+        queue_capacity: int | None,
         no_of_servers: int,
-        arrival_distribution: str,
-        service_distribution: str,
+        arrival_distribution: Source,
+        service_distribution: Source,
         discipline: str,
         t_star: int,
         k_star: int,
-        speed: int,
         duration: int,
         arrival_batch_probability: float = 0,
         arrival_batch_distribution: str = None,
@@ -56,7 +64,7 @@ class Simulation:
         service_dependency_stop: int = None,
         server_select_rand_probability: float = 0,
         priority_probability: float = 0,
-        priority_service_distribution: str = None,
+        priority_service_distribution: Source | None = None,
         bulk: bool = False,
         bulk_start: int = None,
         bulk_half: int = None,
@@ -64,15 +72,28 @@ class Simulation:
         renege=False,
         renege_start: int = None,
         renege_half: int = None,
-        renege_stop: int = None
+        renege_stop: int = None,
+        seed: int | np.random.SeedSequence | None = None,
+        event_driven: bool = False,
+        server_policy: str = 'Random',
+        server_speeds: list[float] | None = None,
+        instrument: bool = False,
+        trace: str | None = None,
+        warmup: float | str | None = None,
+        precision: dict[str, float] | None = None,
+        confidence: float = 0.95
     ):
+        self.warmup = warmup
         self.events = event_heap
-        self.arrival_distribution = arrival_distribution
+        self.random = RandomStream(seed)
+        self.arrival_distribution = sampler(arrival_distribution, self.TIME_PRECISION, self.random)
         self.arrival_batch_probability = arrival_batch_probability
-        self.arrival_batch_distribution = arrival_batch_distribution
+        self.arrival_batch_distribution = optional_sampler(
+            arrival_batch_distribution, self.TIME_PRECISION, self.random, is_integer=True
+        )
         self.priority_probability = priority_probability
-        self.speed = speed
         self.duration = duration
+        self.event_driven = event_driven
 
         self.time = 0
         self.last_arrival_time = 0
@@ -80,6 +101,8 @@ class Simulation:
             event_heap,
             queue_capacity,
             no_of_servers,
+            server_policy,
+            server_speeds,
             service_distribution,
             priority_service_distribution,
             service_batch_probability,
@@ -100,16 +123,26 @@ class Simulation:
             discipline,
             t_star,
             k_star,
-            self.TIME_PRECISION
+            self.TIME_PRECISION,
+            self.TIME_UPDATE_UNIT,
+            self.random,
+            TraceRecorder(trace) if trace is not None else None
         )
+        self.instrumentation = Instrumentation(self) if instrument else None
+        self.warmup_detector = WarmupDetector(self) if warmup == 'auto' else None
+        self.stopping = SequentialStop(self, precision, confidence) if precision else None
 
     def initiate_events(self):
         arrival_times = np.cumsum(
-            [distribution(self.arrival_distribution, self.TIME_PRECISION) for _ in range(self.INITIAL_NO_OF_ARRIVALS)]
+            [self.arrival_distribution() for _ in range(self.INITIAL_NO_OF_ARRIVALS)]
         )
         arrival_times_rounded = list(map(lambda t: round(t, self.TIME_PRECISION), arrival_times))
-        self.events.build_heap(arrival_times_rounded)
+        self.events.build_heap([time for time in arrival_times_rounded if math.isfinite(time)])
         self.last_arrival_time = arrival_times_rounded[-1]
+        if self.warmup_detector is not None:
+            self.warmup_detector.record()
+        elif self.warmup:
+            self.events.add(Warmup(round(self.warmup, self.TIME_PRECISION)))
 
     def get_next_event(self):
         return self.events.pop()
@@ -119,14 +152,13 @@ class Simulation:
 
     def add_new_arrival(self):
         new_arrival_time = round(
-            self.last_arrival_time+distribution(self.arrival_distribution, self.TIME_PRECISION), self.TIME_PRECISION
+            self.last_arrival_time+self.arrival_distribution(), self.TIME_PRECISION
         )
-        self.events.add(Arrival(new_arrival_time))
+        if math.isfinite(new_arrival_time):
+            self.events.add(Arrival(new_arrival_time))
         self.last_arrival_time = new_arrival_time
 
     def next_time(self):
-        if self.speed is not None:
-            sleep(self.TIME_UPDATE_UNIT*10**(-self.speed))
         return round(self.time+self.TIME_UPDATE_UNIT, self.TIME_PRECISION)
 
     def floored_time(self, time):
@@ -135,49 +167,133 @@ class Simulation:
         )
 
     def is_arrival_batch(self):
-        return boolean_function(self.arrival_batch_probability)
+        return boolean_function(self.arrival_batch_probability, self.random)
 
     def is_priority(self):
-        return boolean_function(self.priority_probability)
-
-    def create_customer(self, time: float) -> list[Customer]:
-        no_customer_in_arrival = int(round(
-            distribution(self.arrival_batch_distribution, self.TIME_PRECISION, is_integer=True), self.TIME_PRECISION
-        )) if self.is_arrival_batch() else 1
-        priority = self.is_priority()
-        customer = []
-        for _ in range(no_customer_in_arrival):
-            customer.append(Customer(time, priority))
-        return customer
+        return boolean_function(self.priority_probability, self.random)
+
+    def create_customer(self, time: float) -> range:
+        no_customer_in_arrival = batch_size(
+            self.arrival_batch_distribution(), self.TIME_PRECISION
+        ) if self.is_arrival_batch() else 1
+        return self.system.customers.add(time, self.is_priority(), no_customer_in_arrival)
 
     def event_manager(self, event: Event) -> None:
-        if event.type == "Arrival":
+        if event.type is EventType.ARRIVAL:
             self.system.arrival(self.create_customer(event.time))
             self.add_new_arrival()
-        elif event.type == "Service End":
+        elif event.type is EventType.SERVICE_END:
             self.system.service_end(event)
+        elif event.type is EventType.RENEGE:
+            self.system.renege(event)
+        elif event.type is EventType.WARMUP:
+            self.system.reset_measures(event.time)
 
-    def update_manager(self, turn_over_time: float, ending: bool = False) -> None:
+    def update_manager(self, turn_over_time: float) -> None:
         while self.time < turn_over_time:
             self.time = self.next_time()
-            self.system.update_measures(situation='Regular', time=self.time)
-        if ending:
-            self.system.update_measures(situation='Ending', time=self.time)
-            self.time = self.next_time()
+            self.system.update_regular(self.time)
 
-    def run(self) -> None:
-        self.initiate_events()
-        while self.time <= self.duration:
-            event = self.get_next_event()
-            if event.time > self.duration:
-                self.update_manager(self.duration, ending=True)
-            elif self.floored_time(event.time) == self.duration:
-                self.update_manager(self.duration)
+    def advance(self, until: float) -> None:
+        if self.event_driven:
+            while not self.events.is_empty() and self.get_peek_event().time <= until:
+                event = self.get_next_event()
+                self.time = event.time
                 self.event_manager(event)
-                if self.get_peek_event().time > self.duration:
-                    self.update_manager(self.duration, ending=True)
-            elif self.floored_time(event.time) == self.time:
-                self.event_manager(event)
-            else:
+            self.time = until
+            self.system.update_regular(self.time)
+        else:
+            while not self.events.is_empty() and self.get_peek_event().time <= until:
+                event = self.get_next_event()
                 self.update_manager(self.floored_time(event.time))
                 self.event_manager(event)
+            self.update_manager(until)
+
+    def finish(self) -> None:
+        self.system.update_ending(self.time)
+        if self.warmup_detector is not None:
+            self.warmup = self.warmup_detector.apply()
+        if self.system.trace is not None:
+            self.system.trace.close()
+
+    def run(self) -> None:
+        if self.stopping is not None or self.warmup_detector is not None:
+            for _ in self.steps(self.duration):
+                pass
+            return
+        self.initiate_events()
+        self.advance(self.duration)
+        self.finish()
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(
+            self.time,
+            min(self.time/self.duration, 1) if self.duration else 1,
+            len(self.system.queue),
+            self.system.service_center.no_of_busy_servers(),
+            self.system.average_no_of_customers_system,
+            self.system.average_time_spent_per_customer,
+            self.system.queue.average_no_of_customers,
+            self.system.queue.average_time_spent_per_customer
+        )
+
+    def steps(self, interval: float) -> Iterator[Snapshot]:
+        self.initiate_events()
+        measuring = self.stopping is not None or self.warmup_detector is not None
+        step = self.duration/self.NO_OF_CHECKPOINTS if measuring else interval
+        if not self.event_driven:
+            interval = max(self.TIME_UPDATE_UNIT, self.floored_time(interval))
+            step = max(self.TIME_UPDATE_UNIT, self.floored_time(step))
+        checkpoint = 0
+        next_snapshot = interval
+        while checkpoint < self.duration:
+            checkpoint = min(round(checkpoint+step, self.TIME_PRECISION), self.duration)
+            self.advance(checkpoint)
+            if self.warmup_detector is not None:
+                self.warmup_detector.record()
+            if self.stopping is not None and self.stopping.check():
+                self.duration = checkpoint
+            if checkpoint >= next_snapshot or checkpoint >= self.duration:
+                while next_snapshot <= checkpoint:
+                    next_snapshot = round(next_snapshot+interval, self.TIME_PRECISION)
+                yield self.snapshot()
+        self.finish()
+
+    def report(self) -> dict[str, float]:
+        system, queue, service_center = self.system, self.system.queue, self.system.service_center
+        return {
+            'all_time_no_of_customers': system.all_time_no_of_customers,
+            'all_time_no_of_customers_system': system.all_time_no_of_customers_system,
+            'average_no_of_customers_system': system.average_no_of_customers_system,
+            'average_time_spent_per_customer_system': system.average_time_spent_per_customer,
+            'all_time_no_of_customers_queue': system.all_time_no_of_customers_queue,
+            'average_no_of_customers_queue': queue.average_no_of_customers,
+            'average_time_spent_per_customer_queue': queue.average_time_spent_per_customer,
+            'all_time_no_of_customers_service_center': system.all_time_no_of_customers_service_center,
+            'average_no_of_customers_service_center': service_center.average_no_of_customers,
+            'average_time_spent_per_customer_service_center': service_center.average_time_spent_per_customer,
+            'no_of_finished_customers': system.no_of_finished_customers,
+            'no_of_unfinished_customers': system.no_of_unfinished_customers,
+            'no_of_unfinished_customers_queue': len(queue),
+            'no_of_unfinished_customers_service_center': len(service_center),
+            'no_of_customers_turned_away': system.no_of_customers_turned_away,
+            'proportion_of_customers_turned_away': system.proportion_of_customers_turned_away,
+            'no_of_bulking': system.no_of_bulking,
+            'proportion_of_bulking': system.proportion_of_bulking,
+            'no_of_reneging': queue.no_of_reneging,
+            'proportion_of_reneging': queue.proportion_of_reneging,
+            'no_of_customers_skip_queue': system.no_of_customers_skip_queue,
+            'proportion_of_customers_skip_queue': system.proportion_of_customers_skip_queue,
+            'no_of_customers_delayed_longer_t_star': queue.no_of_customers_delayed_longer_t_star,
+            'proportion_of_customers_delayed_longer_t_star': queue.proportion_of_customers_delayed_longer_t_star,
+            'total_time_queue_contains_more_k_star_customers': queue.total_time_queue_contains_more_k_star_customers,
+            'proportion_of_time_queue_contains_more_k_star_customers':
+                queue.proportion_of_time_queue_contains_more_k_star_customers,
+            'no_of_arrivals': system.no_of_arrivals,
+            'arrival_rate': system.arrival_rate,
+            'service_rate': service_center.service_rate,
+            'average_service_rate': service_center.average_service_rate,
+            'average_server_utilization': service_center.average_server_utilization,
+            'average_arrival_batch_size': system.average_arrival_batch_size,
+            'average_service_batch_size': service_center.average_service_batch_size,
+        }
@@ -0,0 +1,109 @@
+from __future__ import annotations
+from typing import Callable, TYPE_CHECKING
+import numpy as np
+from . import PRECISION
+from src.accumulators import TimeWeightedAverage, Welford
+if TYPE_CHECKING:
+    from src.simulation import Simulation
+    from src.system import System
+
+
+def time_average(accumulator: TimeWeightedAverage) -> tuple[float, float]:
+    return accumulator.area, accumulator.elapsed
+
+
+def customer_average(accumulator: Welford) -> tuple[float, float]:
+    return accumulator.mean*accumulator.count, accumulator.count
+
+
+RATIOS: dict[str, Callable[[System], tuple[float, float]]] = {
+    'average_no_of_customers_system': lambda system: time_average(system.no_of_customers_system),
+    'average_time_spent_per_customer_system': lambda system: customer_average(system.time_spent_per_customer),
+    'average_no_of_customers_queue': lambda system: time_average(system.queue.no_of_customers),
+    'average_time_spent_per_customer_queue': lambda system: customer_average(system.queue.time_spent_per_customer),
+    'average_no_of_customers_service_center':
+        lambda system: time_average(system.service_center.no_of_customers_over_time),
+    'proportion_of_time_queue_contains_more_k_star_customers':
+        lambda system: time_average(system.queue.queue_contains_more_k_star_customers),
+    'proportion_of_customers_turned_away':
+        lambda system: (system.no_of_customers_turned_away, system.all_time_no_of_customers),
+    'proportion_of_customers_skip_queue':
+        lambda system: (system.no_of_customers_skip_queue, system.all_time_no_of_customers_system),
+    'arrival_rate': lambda system: (system.no_of_arrivals, system.no_of_customers_system.elapsed),
+}
+
+
+class Estimate:
+    def __init__(self, samples: list[float], confidence: float) -> None:
+        import scipy.stats as sc
+        self.no_of_samples = len(samples)
+        self.mean = float(np.mean(samples))
+        self.standard_error = float(np.std(samples, ddof=1)/np.sqrt(len(samples))) if len(samples) > 1 else float('nan')
+        self.confidence = confidence
+        self.half_width = float(sc.t.ppf((1+confidence)/2, len(samples)-1)*self.standard_error) \
+            if len(samples) > 1 else float('nan')
+
+    @property
+    def lower(self) -> float:
+        return self.mean-self.half_width
+
+    @property
+    def upper(self) -> float:
+        return self.mean+self.half_width
+
+    def __repr__(self) -> str:
+        return f"{round(self.mean, PRECISION)} ± {round(self.half_width, PRECISION)}"
+
+
+def lag_correlation(samples: np.ndarray) -> float:
+    if samples[:-1].std() == 0 or samples[1:].std() == 0:
+        return 0
+    return float(np.corrcoef(samples[:-1], samples[1:])[0, 1])
+
+
+class SequentialStop:
+    NO_OF_BATCHES = 20
+    MAX_LAG_CORRELATION = 0.2
+
+    def __init__(self, simulation: Simulation, targets: dict[str, float], confidence: float = 0.95) -> None:
+        unknown = set(targets)-set(RATIOS)
+        if unknown:
+            raise ValueError(f"no batch-means estimator for: {', '.join(sorted(unknown))}")
+        self.simulation = simulation
+        self.targets = targets
+        self.confidence = confidence
+        self.intervals: dict[str, list[tuple[float, float]]] = {metric: [] for metric in targets}
+        self.last: dict[str, tuple[float, float]] = {metric: (0, 0) for metric in targets}
+        self.estimates: dict[str, Estimate] = {}
+        self.is_met = False
+
+    def observe(self) -> None:
+        warmup = self.simulation.warmup
+        if self.simulation.warmup_detector is None and warmup and self.simulation.time <= warmup:
+            return
+        for metric in self.targets:
+            numerator, denominator = RATIOS[metric](self.simulation.system)
+            self.intervals[metric].append((numerator-self.last[metric][0], denominator-self.last[metric][1]))
+            self.last[metric] = (numerator, denominator)
+
+    def batch_means(self, metric: str, cut: int) -> np.ndarray:
+        intervals = np.array(self.intervals[metric][cut:])
+        size = len(intervals)//self.NO_OF_BATCHES
+        batches = intervals[len(intervals)-size*self.NO_OF_BATCHES:].reshape(self.NO_OF_BATCHES, size, 2).sum(1)
+        means = np.full(self.NO_OF_BATCHES, np.nan)
+        return np.divide(batches[:, 0], batches[:, 1], out=means, where=batches[:, 1] != 0)
+
+    def check(self) -> bool:
+        self.observe()
+        detector = self.simulation.warmup_detector
+        cut = detector.truncation() if detector is not None else 0
+        if len(next(iter(self.intervals.values()), []))-cut < self.NO_OF_BATCHES:
+            return False
+        self.is_met = True
+        for metric, target in self.targets.items():
+            means = self.batch_means(metric, cut)
+            self.estimates[metric] = estimate = Estimate(means.tolist(), self.confidence)
+            self.is_met &= bool(
+                estimate.half_width <= target*abs(estimate.mean) and lag_correlation(means) <= self.MAX_LAG_CORRELATION
+            )
+        return self.is_met
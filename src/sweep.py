@@ -0,0 +1,102 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Iterator
+import hashlib
+import json
+import os
+import numpy as np
+from src.replication import run_replication
+
+
+def grid(base: dict[str, Any], axes: dict[str, list]) -> list[dict[str, Any]]:
+    return [{**base, **dict(zip(axes, values))} for values in product(*axes.values())]
+
+
+def latin_hypercube(
+    base: dict[str, Any],
+    ranges: dict[str, tuple[float, float]],
+    no_of_points: int,
+    seed: int | None = None,
+    build: Callable[[dict[str, float]], dict[str, Any]] | None = None
+) -> list[dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    columns = {
+        key: low+(rng.permutation(no_of_points)+rng.random(no_of_points))/no_of_points*(high-low)
+        for key, (low, high) in ranges.items()
+    }
+    points = [{key: float(column[i]) for key, column in columns.items()} for i in range(no_of_points)]
+    return [{**base, **(build(point) if build is not None else point)} for point in points]
+
+
+def encode(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return {'dtype': value.dtype.str, 'shape': list(value.shape), 'sha256': digest}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"cannot key a sweep point on a {type(value).__name__}; use JSON values or NumPy arrays")
+
+
+def point_key(config: dict[str, Any], seed: int) -> str:
+    point = json.dumps({'config': config, 'seed': seed}, sort_keys=True, default=encode)
+    return hashlib.sha256(point.encode()).hexdigest()
+
+
+def point_seed(key: str, seed: int) -> np.random.SeedSequence:
+    return np.random.SeedSequence(seed, spawn_key=(int(key[:16], 16),))
+
+
+class ResultCache:
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, float] | None:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        with open(path) as file:
+            return json.load(file)['result']
+
+    def put(self, key: str, config: dict[str, Any], seed: int, result: dict[str, float]) -> None:
+        temporary = self.path(key).with_suffix('.tmp')
+        with open(temporary, 'w') as file:
+            json.dump({'config': config, 'seed': seed, 'result': result}, file, default=encode)
+        os.replace(temporary, self.path(key))
+
+
+def sweep(
+    points: list[dict[str, Any]],
+    seed: int | None = None,
+    cache_dir: str | os.PathLike | None = None,
+    max_workers: int | None = None
+) -> Iterator[tuple[dict[str, Any], dict[str, float]]]:
+    if cache_dir is not None and seed is None:
+        raise ValueError("a result cache needs a fixed seed; without one no cached point can ever be reused")
+    seed = np.random.SeedSequence(seed).entropy
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    pending: dict[str, dict[str, Any]] = {}
+    for config in points:
+        key = point_key(config, seed)
+        result = cache.get(key) if cache is not None else None
+        if result is not None:
+            yield config, result
+        else:
+            pending[key] = config
+    if not pending:
+        return
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = {
+            executor.submit(run_replication, config, point_seed(key, seed)): key for key, config in pending.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            result = future.result()
+            if cache is not None:
+                cache.put(key, pending[key], seed, result)
+            yield pending[key], result
@@ -2,21 +2,35 @@ from __future__ import annotations
 from . import PRECISION
 from src.service_center import ServiceCenter
 from src.queue_management import Queue
-from src.math_utils import update_function, logistic, boolean_function
-from typing import TYPE_CHECKING, Any
+from src.math_utils import logistic, boolean_function
+from src.accumulators import TimeWeightedAverage, Welford, copy_state, remove_state
+from src.trace import Outcome
+from src.customer_store import CustomerStore
+from typing import TYPE_CHECKING, Any, Sequence
 if TYPE_CHECKING:
-    from src.simulation import Customer
-    from src.event import ServiceEnd, EventHeap
+    from src.math_utils import Source
+    from src.event import ServiceEnd, Renege, EventList
+    from src.random_stream import RandomStream
+    from src.trace import TraceRecorder
 
 
 class System:
+    COUNTERS = (
+        'no_of_finished_customers', 'all_time_no_of_customers', 'all_time_no_of_customers_system',
+        'all_time_no_of_customers_service_center', 'all_time_no_of_customers_queue', 'no_of_unfinished_customers',
+        'no_of_arrivals', 'no_of_customers_skip_queue', 'no_of_customers_turned_away', 'no_of_bulking'
+    )
+    ACCUMULATORS = ('no_of_customers_system', 'time_spent_per_customer')
+
     def __init__(
         self,
-        event_heap: EventHeap,
-        queue_capacity: int,
+        event_heap: EventList,
+        queue_capacity: int | None,
         no_of_servers: int,
-        service_distribution: str,
-        priority_service_distribution: str,
+        server_policy: str,
+        server_speeds: list[float] | None,
+        service_distribution: Source,
+        priority_service_distribution: Source | None,
         service_batch_probability: float,
         service_batch_distribution: str,
         service_dependency: bool,
@@ -36,7 +50,13 @@ class System:
         t_star: int,
         k_star: int,
         time_precision: int,
+        time_update_unit: float,
+        stream: RandomStream,
+        trace: TraceRecorder | None = None
     ) -> None:
+        self.random = stream
+        self.trace = trace
+        self.customers = CustomerStore()
         self.bulk = bulk
         self.bulk_start = bulk_start
         self.bulk_half = bulk_half
@@ -49,19 +69,19 @@ class System:
         self.all_time_no_of_customers_queue: int = 0
         self.no_of_unfinished_customers: int = 0
 
-        self.average_no_of_customers_system: float = 0
-        self.average_time_spent_per_customer: float = 0
+        self.no_of_customers_system = TimeWeightedAverage()
+        self.time_spent_per_customer = Welford()
 
         self.no_of_arrivals: int = 0
         self.no_of_customers_skip_queue: int = 0
         self.no_of_customers_turned_away: int = 0
         self.no_of_bulking: int = 0
 
-        self.last_data: dict[str, int | float] = {'time': 0, 'number': 0}
-
         self.service_center = ServiceCenter(
             event_heap,
             no_of_servers,
+            server_policy,
+            server_speeds,
             service_distribution,
             priority_service_distribution,
             service_batch_probability,
@@ -70,9 +90,12 @@ class System:
             service_dependency_start,
             service_dependency_half,
             service_dependency_stop,
-            time_precision
+            time_precision,
+            stream,
+            self.customers
         )
         self.queue = Queue(
+            event_heap,
             queue_capacity,
             server_select_rand_probability,
             renege,
@@ -81,9 +104,20 @@ class System:
             renege_stop,
             t_star,
             k_star,
-            discipline
+            discipline,
+            time_update_unit,
+            stream,
+            self.customers
         )
 
+    @property
+    def average_no_of_customers_system(self) -> float:
+        return round(self.no_of_customers_system.mean, PRECISION)
+
+    @property
+    def average_time_spent_per_customer(self) -> float:
+        return round(self.time_spent_per_customer.mean, PRECISION)
+
     @property
     def average_arrival_batch_size(self) -> float:
         if self.no_of_arrivals == 0:
@@ -92,9 +126,9 @@ class System:
 
     @property
     def arrival_rate(self) -> float:
-        if self.last_data['time'] == 0:
+        if self.no_of_customers_system.elapsed == 0:
             return 0
-        return round(self.no_of_arrivals/self.last_data['time'], PRECISION)
+        return round(self.no_of_arrivals/self.no_of_customers_system.elapsed, PRECISION)
 
     @property
     def proportion_of_customers_skip_queue(self) -> float:
@@ -121,114 +155,115 @@ class System:
         if not self.bulk:
             return False
         probability = 1-logistic(len(self.queue), self.bulk_start, self.bulk_half, self.bulk_stop)
-        return boolean_function(probability)
+        return boolean_function(probability, self.random)
 
-    def arrival(self, customer: list[Customer]) -> None:
-        self.update_measures(situation='Arrival', customer_size=len(customer))
+    def arrival(self, customer: Sequence[int]) -> None:
+        self.no_of_arrivals += 1
+        self.all_time_no_of_customers += len(customer)
+        self.all_time_no_of_customers_system += len(customer)
+        if self.trace is not None:
+            self.trace.arrive(customer, self.customers)
         if not self.service_center.is_full():
             for _ in range(self.service_center.remaining_capacity()):
                 if customer:
                     customer = self.join_service_center_manager(customer)
+        outcome = Outcome.TURNED_AWAY
         if customer and not self.queue.is_full():
             if self.is_bulk():
-                self.update_measures(situation='Bulk', customer_size=len(customer))
+                self.no_of_bulking += len(customer)
+                outcome = Outcome.BULKED
             else:
                 customer = self.join_queue_manager(customer)
         if customer:
-            self.update_measures(situation='Turned Away', customer_size=len(customer))
+            self.all_time_no_of_customers_system -= len(customer)
+            self.no_of_customers_turned_away += len(customer)
+            if self.trace is not None:
+                self.trace.leave(customer, outcome)
 
-    def join_service_center_manager(self, customer: list[Customer]) -> list[Customer]:
+    def join_service_center_manager(self, customer: Sequence[int]) -> Sequence[int]:
         no_customers_in_next_service = self.service_center.no_of_customers_in_next_service()
         customers_join_service_center = customer[:no_customers_in_next_service]
-        self.service_center.initiate_service(
+        service = self.service_center.initiate_service(
                 customer=customers_join_service_center,
-                start_time=customers_join_service_center[0].arrival_time,
+                start_time=self.customers.arrival_time[customers_join_service_center[0]],
                 length_of_queue=len(self.queue)
             )
-        self.update_measures(situation='Join Service Center', customer_size=len(customers_join_service_center))
-        self.update_measures(situation='Skip Queue', customer_size=len(customers_join_service_center))
-        self.update_measures(situation='Regular', time=customer[0].arrival_time)
+        if self.trace is not None:
+            self.trace.start_service(service)
+        self.all_time_no_of_customers_service_center += len(customers_join_service_center)
+        self.no_of_customers_skip_queue += len(customers_join_service_center)
+        self.update_regular(self.customers.arrival_time[customer[0]])
         return customer[no_customers_in_next_service:]
 
-    def join_queue_manager(self, customer: list[Customer]) -> list[Customer]:
+    def join_queue_manager(self, customer: Sequence[int]) -> Sequence[int]:
         queue_remaining_capacity = self.queue.remaining_capacity()
         self.queue.join(customer[:queue_remaining_capacity])
-        self.update_measures(situation='Join Queue', customer_size=len(customer[:queue_remaining_capacity]))
-        self.update_measures(situation='Regular', time=customer[0].arrival_time)
+        if self.trace is not None:
+            self.trace.join_queue(customer[:queue_remaining_capacity], self.customers.arrival_time[customer[0]])
+        self.all_time_no_of_customers_queue += len(customer[:queue_remaining_capacity])
+        self.update_regular(self.customers.arrival_time[customer[0]])
         return customer[queue_remaining_capacity:]
 
     def service_end(self, event: ServiceEnd) -> None:
         self.service_center.service_end(event.service)
+        if self.trace is not None:
+            self.trace.end_service(event.service)
         if not self.queue.is_empty():
             customers = list(self.queue.pop(min(len(self.queue), self.service_center.no_of_customers_in_next_service())))
             for customer in customers:
-                self.queue.update_measures(situation='Pop', arrival_time=customer.arrival_time, exit_time=event.service.end)
-            self.queue.update_measures(situation='Regular', time=event.service.end)
-            self.service_center.initiate_service(
+                self.queue.update_pop(self.customers.arrival_time[customer], event.service.end)
+            self.queue.update_regular(event.service.end)
+            service = self.service_center.initiate_service(
                 customer=customers,
                 start_time=event.service.end,
                 length_of_queue=len(self.queue)
             )
-            self.update_measures(situation='Join Service Center', customer_size=len(customers))
+            if self.trace is not None:
+                self.trace.start_service(service)
+            self.all_time_no_of_customers_service_center += len(customers)
         for customer in event.service.customer:
-            self.update_measures(
-                situation='Service End', service_end=event.service.end, customer_arrival=customer.arrival_time
-            )
-        self.update_measures(situation='Regular', time=event.service.end)
-
-    def update_measures(self, **kwargs: Any) -> None:
-        match kwargs['situation']:
-            case 'Regular':
-                time = kwargs['time']
-                self.average_no_of_customers_system = update_function(
-                    self.average_no_of_customers_system,
-                    self.last_data['time'],
-                    self.last_data['number'],
-                    time-self.last_data['time'],
-                    time
-                )
-                self.last_data['time'] = time
-                self.last_data['number'] = len(self)
-                self.service_center.update_measures(situation='Regular', time=time)
-                self.queue.update_measures(situation='Regular', time=time)
-            case 'Arrival':
-                self.no_of_arrivals += 1
-                self.all_time_no_of_customers += kwargs['customer_size']
-                self.all_time_no_of_customers_system += kwargs['customer_size']
-            case 'Join Service Center':
-                self.all_time_no_of_customers_service_center += kwargs['customer_size']
-            case 'Skip Queue':
-                self.no_of_customers_skip_queue += kwargs['customer_size']
-            case 'Join Queue':
-                self.all_time_no_of_customers_queue += kwargs['customer_size']
-            case 'Bulk':
-                self.no_of_bulking += kwargs['customer_size']
-            case 'Turned Away':
-                self.all_time_no_of_customers_system -= kwargs['customer_size']
-                self.no_of_customers_turned_away += kwargs['customer_size']
-            case 'Service End':
-                self.average_time_spent_per_customer = update_function(
-                    self.average_time_spent_per_customer,
-                    self.no_of_finished_customers,
-                    kwargs['service_end'] - kwargs['customer_arrival'],
-                    1,
-                    self.no_of_finished_customers+1
-                )
-                self.no_of_finished_customers += 1
-            case 'Ending':
-                time = kwargs['time']
-                customers = self.queue.combine_queue()
-                customers.extend([customer
-                                  for service in self.service_center.unfinished_services
-                                  for customer in service.customer])
-                for customer in customers:
-                    self.average_time_spent_per_customer = update_function(
-                        self.average_time_spent_per_customer,
-                        self.no_of_finished_customers+self.no_of_unfinished_customers,
-                        time - customer.arrival_time,
-                        1,
-                        self.no_of_finished_customers+self.no_of_unfinished_customers+1
-                    )
-                    self.no_of_unfinished_customers += 1
-                self.service_center.update_measures(situation='Ending', time=time)
-                self.queue.update_measures(situation='Ending', time=time)
+            self.time_spent_per_customer.add(event.service.end - self.customers.arrival_time[customer])
+            self.no_of_finished_customers += 1
+        self.update_regular(event.service.end)
+
+    def renege(self, event: Renege) -> None:
+        self.queue.renege_customer(event.customer, event.time)
+        if self.trace is not None:
+            self.trace.leave([event.customer], Outcome.RENEGED)
+        self.update_regular(event.time)
+
+    def update_regular(self, time: float) -> None:
+        self.no_of_customers_system.update(time, len(self))
+        self.service_center.update_regular(time)
+        self.queue.update_regular(time)
+
+    def update_ending(self, time: float) -> None:
+        customers = self.queue.combine_queue()
+        customers.extend([customer
+                          for service in self.service_center.unfinished_services
+                          for customer in service.customer])
+        for customer in customers:
+            self.time_spent_per_customer.add(time - self.customers.arrival_time[customer])
+            self.no_of_unfinished_customers += 1
+        self.service_center.update_ending(time)
+        self.queue.update_ending(time)
+
+    def reset_measures(self, time: float) -> None:
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.no_of_customers_system = TimeWeightedAverage(time, len(self))
+        self.time_spent_per_customer = Welford()
+        self.service_center.reset_measures(time)
+        self.queue.reset_measures(time)
+
+    def measures(self) -> dict[str, Any]:
+        return {
+            **copy_state(self, self.COUNTERS, self.ACCUMULATORS),
+            'queue': self.queue.measures(),
+            'service_center': self.service_center.measures()
+        }
+
+    def remove_measures(self, state: dict[str, Any]) -> None:
+        remove_state(self, state, self.COUNTERS, self.ACCUMULATORS)
+        self.queue.remove_measures(state['queue'])
+        self.service_center.remove_measures(state['service_center'])
@@ -0,0 +1,112 @@
+from __future__ import annotations
+from enum import IntEnum
+from typing import Iterator, Sequence, TYPE_CHECKING
+import glob
+import os
+import numpy as np
+if TYPE_CHECKING:
+    from src.customer_store import CustomerStore
+    from src.service_center import Service
+
+
+class Outcome(IntEnum):
+    SERVED = 0
+    TURNED_AWAY = 1
+    BULKED = 2
+    RENEGED = 3
+    UNFINISHED = 4
+
+
+TRACE_DTYPE = np.dtype([
+    ('customer', np.int64),
+    ('batch', np.int64),
+    ('priority', np.bool_),
+    ('arrival', np.float64),
+    ('queue_join', np.float64),
+    ('service_start', np.float64),
+    ('service_end', np.float64),
+    ('server', np.int32),
+    ('outcome', np.int8),
+])
+
+
+class TraceRecorder:
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, directory: str, chunk_size: int = CHUNK_SIZE) -> None:
+        os.makedirs(directory, exist_ok=True)
+        if glob.glob(os.path.join(directory, 'trace-*.npy')):
+            raise FileExistsError(f"{directory} already holds a trace; record each run into its own directory")
+        self.directory = directory
+        self.buffer = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self.size: int = 0
+        self.no_of_chunks: int = 0
+        self.no_of_records: int = 0
+        self.pending: dict[int, list] = {}
+
+    def __len__(self) -> int:
+        return self.no_of_records
+
+    def arrive(self, customers: Sequence[int], store: CustomerStore) -> None:
+        for customer in customers:
+            self.pending[customer] = [
+                customer, store.batch[customer], store.priority[customer], store.arrival_time[customer],
+                np.nan, np.nan, np.nan, -1
+            ]
+
+    def join_queue(self, customers: Sequence[int], time: float) -> None:
+        for customer in customers:
+            self.pending[customer][4] = time
+
+    def start_service(self, service: Service) -> None:
+        for customer in service.customer:
+            record = self.pending[customer]
+            record[5] = service.start
+            record[7] = service.server.id
+
+    def end_service(self, service: Service) -> None:
+        for customer in service.customer:
+            self.pending[customer][6] = service.end
+            self.write(customer, Outcome.SERVED)
+
+    def leave(self, customers: Sequence[int], outcome: Outcome) -> None:
+        for customer in customers:
+            self.write(customer, outcome)
+
+    def write(self, customer: int, outcome: Outcome) -> None:
+        self.buffer[self.size] = (*self.pending.pop(customer), outcome)
+        self.size += 1
+        self.no_of_records += 1
+        if self.size == len(self.buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.size == 0:
+            return
+        np.save(os.path.join(self.directory, f'trace-{self.no_of_chunks:05d}.npy'), self.buffer[:self.size])
+        self.no_of_chunks += 1
+        self.size = 0
+
+    def close(self) -> None:
+        for customer in list(self.pending):
+            self.write(customer, Outcome.UNFINISHED)
+        self.flush()
+
+
+class Trace:
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.chunks: list[np.ndarray] = [
+            np.load(path, mmap_mode='r') for path in sorted(glob.glob(os.path.join(directory, 'trace-*.npy')))
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.chunks)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if not self.chunks:
+            return np.empty(0, dtype=TRACE_DTYPE[column])
+        return np.concatenate([chunk[column] for chunk in self.chunks])
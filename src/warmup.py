@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import Any, TYPE_CHECKING
+import numpy as np
+if TYPE_CHECKING:
+    from src.simulation import Simulation
+
+
+BATCH_SIZE = 5
+
+
+def mser(series: np.ndarray, batch_size: int = BATCH_SIZE) -> int:
+    no_of_batches = len(series)//batch_size
+    if no_of_batches < 2:
+        return 0
+    batches = np.asarray(series[:no_of_batches*batch_size], dtype=float).reshape(no_of_batches, batch_size).mean(1)
+    remaining = np.arange(no_of_batches, 0, -1)
+    sums = np.cumsum(batches[::-1])[::-1]
+    squares = np.cumsum(batches[::-1]**2)[::-1]
+    statistic = (squares-sums**2/remaining)/remaining**2
+    return int(np.argmin(statistic[:max(1, no_of_batches//2)]))*batch_size
+
+
+class WarmupDetector:
+    def __init__(self, simulation: Simulation) -> None:
+        self.simulation = simulation
+        self.times: list[float] = []
+        self.queue_areas: list[float] = []
+        self.total_time_spent: list[float] = []
+        self.no_of_leaving: list[int] = []
+        self.states: list[dict[str, Any]] = []
+
+    def record(self) -> None:
+        system = self.simulation.system
+        time_spent = system.time_spent_per_customer
+        self.times.append(self.simulation.time)
+        self.queue_areas.append(system.queue.no_of_customers.area)
+        self.total_time_spent.append(time_spent.mean*time_spent.count)
+        self.no_of_leaving.append(time_spent.count)
+        self.states.append(system.measures())
+
+    def series(self) -> tuple[np.ndarray, np.ndarray]:
+        lengths = np.diff(self.queue_areas)/np.diff(self.times)
+        no_of_leaving = np.diff(self.no_of_leaving)
+        waits = np.full(len(no_of_leaving), np.nan)
+        np.divide(np.diff(self.total_time_spent), no_of_leaving, out=waits, where=no_of_leaving != 0)
+        return lengths, waits
+
+    def truncation(self) -> int:
+        lengths, waits = self.series()
+        cut = mser(lengths)
+        observed = np.flatnonzero(~np.isnan(waits))
+        if len(observed):
+            cut = max(cut, int(observed[mser(waits[observed])]))
+        return cut
+
+    def apply(self) -> float:
+        cut = self.truncation()
+        if cut:
+            self.simulation.system.remove_measures(self.states[cut])
+        return round(float(self.times[cut]), self.simulation.TIME_PRECISION)
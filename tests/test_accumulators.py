@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src.accumulators import CompensatedSum, TimeWeightedAverage, Welford
+
+
+def test_compensated_sum_keeps_small_terms():
+    total = CompensatedSum()
+    for x in [1e16, 1.0, -1e16] + [0.1]*10:
+        total.add(x)
+    assert total.value == 2.0
+
+
+def test_time_weighted_average():
+    average = TimeWeightedAverage(1.0, 2)
+    for time, value in [(3.0, 5), (4.0, 0), (7.0, 1)]:
+        average.update(time, value)
+    assert average.area == 2*2+5*1+0*3
+    assert average.mean == pytest.approx(9/6)
+
+
+def test_welford_matches_numpy():
+    samples = np.random.default_rng(1).exponential(3.0, 1000)
+    accumulator = Welford()
+    for x in samples[:500]:
+        accumulator.add(x)
+    for x in samples[500::2]:
+        accumulator.add(x, 2)
+    weighted = np.concatenate([samples[:500], np.repeat(samples[500::2], 2)])
+    assert accumulator.count == len(weighted)
+    assert accumulator.mean == pytest.approx(weighted.mean())
+    assert accumulator.variance == pytest.approx(weighted.var(ddof=1))
+
+
+def test_welford_remove_leaves_the_later_samples():
+    samples = np.random.default_rng(2).normal(5.0, 2.0, 600)
+    accumulator = Welford()
+    for x in samples[:200]:
+        accumulator.add(x)
+    earlier = accumulator.copy()
+    for x in samples[200:]:
+        accumulator.add(x)
+    accumulator.remove(earlier)
+    assert accumulator.count == 400
+    assert accumulator.mean == pytest.approx(samples[200:].mean())
+    assert accumulator.variance == pytest.approx(samples[200:].var(ddof=1))
+    accumulator.remove(accumulator.copy())
+    assert (accumulator.count, accumulator.mean, accumulator.m2) == (0, 0.0, 0.0)
+
+
+def test_time_weighted_average_remove_starts_at_the_copy():
+    steps = [(1.0, 3), (2.5, 1), (4.0, 2), (6.0, 0), (7.5, 4), (9.0, 1)]
+    average = TimeWeightedAverage()
+    for time, value in steps[:3]:
+        average.update(time, value)
+    earlier = average.copy()
+    later = TimeWeightedAverage(*steps[2])
+    for time, value in steps[3:]:
+        average.update(time, value)
+        later.update(time, value)
+    assert earlier.last_time == 4.0
+    average.remove(earlier)
+    assert average.elapsed == later.elapsed
+    assert average.area == pytest.approx(later.area)
+    assert average.mean == pytest.approx(later.mean)
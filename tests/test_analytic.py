@@ -0,0 +1,53 @@
+import pytest
+from src.analytic import mg1, mmck, solve
+
+
+def config(**settings):
+    return {'queue_capacity': None, 'no_of_servers': 1, 'discipline': 'FIFO', 't_star': 1, 'k_star': 1, **settings}
+
+
+def test_mm1():
+    result = mmck(1, 1.25, 1, None, t_star=0, k_star=2)
+    assert result['average_server_utilization'] == pytest.approx(0.8)
+    assert result['average_no_of_customers_system'] == pytest.approx(4)
+    assert result['average_time_spent_per_customer_system'] == pytest.approx(4)
+    assert result['average_no_of_customers_queue'] == pytest.approx(3.2)
+    assert result['average_time_spent_per_customer_queue'] == pytest.approx(4)
+    assert result['proportion_of_customers_skip_queue'] == pytest.approx(0.2)
+    assert result['proportion_of_time_queue_contains_more_k_star_customers'] == pytest.approx(0.8**3)
+
+
+def test_mmc_erlang_c():
+    result = mmck(1, 0.625, 2, None, t_star=1, k_star=1)
+    assert result['average_no_of_customers_queue'] == pytest.approx(25.6/9)
+    assert result['average_no_of_customers_system'] == pytest.approx(25.6/9+1.6)
+    assert result['proportion_of_customers_skip_queue'] == pytest.approx(1-6.4/9)
+    assert result['proportion_of_customers_delayed_longer_t_star'] == pytest.approx(0.7788007830714049)
+
+
+def test_mm1k():
+    result = mmck(1, 2, 1, 2, t_star=0, k_star=1)
+    assert result['proportion_of_customers_turned_away'] == pytest.approx(1/15)
+    assert result['average_no_of_customers_queue'] == pytest.approx(4/15)
+    assert result['average_no_of_customers_system'] == pytest.approx(4/15+7/15)
+
+
+def test_md1():
+    result = mg1(1, 0.5, 0.25)
+    assert result['average_no_of_customers_queue'] == pytest.approx(0.25)
+    assert result['average_time_spent_per_customer_system'] == pytest.approx(0.75)
+    assert result['average_time_spent_per_customer_queue'] == pytest.approx(0.5)
+
+
+def test_mg1_uses_server_speed():
+    result = solve(config(
+        arrival_distribution='Exponential(1.0)', service_distribution='Constant(1.0)', server_speeds=[2.0]
+    ))
+    assert result['model'] == 'M/G/1'
+    assert result['average_server_utilization'] == pytest.approx(0.5)
+    assert result['average_time_spent_per_customer_system'] == pytest.approx(0.75)
+
+
+def test_unstable_system_is_rejected():
+    with pytest.raises(ValueError):
+        solve(config(arrival_distribution='Exponential(1.0)', service_distribution='Exponential(1.0)'))
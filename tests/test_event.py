@@ -0,0 +1,35 @@
+import random
+import pytest
+from src.event import Arrival, CalendarQueue, EventHeap
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_calendar_queue_matches_event_heap(seed):
+    rng = random.Random(seed)
+    heap, calendar = EventHeap(), CalendarQueue()
+    pending = []
+    now = 0.0
+    for _ in range(5000):
+        action = rng.random()
+        if action < 0.5 or heap.is_empty():
+            time = round(now+rng.choice([0.0, rng.expovariate(1.0), rng.uniform(0, 100)]), 2)
+            events = Arrival(time), Arrival(time)
+            heap.add(events[0])
+            calendar.add(events[1])
+            pending.append(events)
+        elif action < 0.6:
+            events = pending.pop(rng.randrange(len(pending)))
+            if not events[0].cancelled:
+                heap.cancel(events[0])
+                calendar.cancel(events[1])
+        elif action < 0.7:
+            assert heap.peek().time == calendar.peek().time
+        else:
+            first, second = heap.pop(), calendar.pop()
+            assert first.time == second.time
+            pending = [events for events in pending if events[0] is not first and events[1] is not second]
+            now = first.time
+        assert len(heap) == len(calendar)
+    while not heap.is_empty():
+        assert heap.pop().time == calendar.pop().time
+    assert calendar.is_empty()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import scipy.stats as sc
+from src.math_utils import normal_table, poisson_table, sampler
+from src.random_stream import RandomStream
+
+
+@pytest.mark.parametrize('m, s, precision, is_integer', [(2.5, 0.5, 2, False), (10.0, 3.0, 1, False), (4.0, 2.0, 2, True)])
+def test_normal_table_matches_truncated_discretized_normal(m, s, precision, is_integer):
+    table = normal_table(m, s, precision, is_integer)
+    step = 1 if is_integer else 10**(-precision)
+    values = np.array(table.values)
+    expected = sc.norm.sf(values-step/2, m, s)-sc.norm.sf(values+step/2, m, s)
+    np.testing.assert_allclose(table.pmf(), expected/expected.sum(), rtol=1e-9, atol=1e-15)
+
+
+@pytest.mark.parametrize('p', [0.5, 2.0, 30.0])
+def test_poisson_table_matches_poisson_pmf(p):
+    table = poisson_table(p, 2)
+    values = np.array(table.values)
+    expected = sc.poisson.pmf(values, p)
+    np.testing.assert_allclose(table.pmf(), expected/expected.sum(), rtol=1e-9, atol=1e-15)
+
+
+def test_alias_draws_follow_table():
+    distribution = sampler('Poisson(3.0)', 2, RandomStream(1))
+    draws = distribution.block(200000)
+    values, counts = np.unique(draws, return_counts=True)
+    pmf = dict(zip(distribution.table.values, distribution.table.pmf()))
+    for value, count in zip(values, counts):
+        assert abs(count/len(draws)-pmf[value]) < 0.005
+
+
+def test_empty_normal_support_is_rejected():
+    with pytest.raises(ValueError, match='Normal'):
+        sampler('Normal(-50.0, 1.0)', 2, RandomStream(1))
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from src.customer_store import CustomerStore
+from src.event import EventHeap
+from src.queue_management import CustomerLine, Queue
+from src.random_stream import RandomStream
+from src.simulation import Simulation
+from src.trace import Outcome, Trace
+
+
+def line_of(discipline, customers):
+    line = CustomerLine(discipline, RandomStream(1))
+    for customer in customers:
+        line.append(customer)
+    return line
+
+
+def drain(line):
+    return [line.pop() for _ in range(len(line))]
+
+
+@pytest.mark.parametrize('discipline, expected', [('FIFO', [0, 2, 4, 5, 6]), ('LIFO', [6, 5, 4, 2, 0])])
+def test_pop_order_skips_removed_customers(discipline, expected):
+    line = line_of(discipline, range(7))
+    line.remove(1)
+    line.remove(3)
+    assert drain(line) == expected
+    assert len(line) == 0
+
+
+def test_siro_pops_every_customer_once_in_random_order():
+    order = drain(line_of('SIRO', range(20)))
+    assert sorted(order) == list(range(20))
+    assert order != list(range(20))
+
+
+def test_removal_compacts_the_order():
+    line = line_of('FIFO', range(1000))
+    for customer in range(0, 1000, 2):
+        line.remove(customer)
+    assert len(line.order) <= 2*len(line)+32
+    assert drain(line) == list(range(1, 1000, 2))
+
+
+def renege_queue(events):
+    return Queue(
+        events, None, 0, True, 2, 5, 10, 2, 3, 'FIFO', 0.1, RandomStream(1), CustomerStore()
+    )
+
+
+def test_served_customers_cannot_renege():
+    events = EventHeap()
+    queue = renege_queue(events)
+    customers = queue.customers.add(0.0, False, 5)
+    queue.join(customers)
+    assert set(queue.renege_events) == set(customers)
+    served = list(queue.pop(2))
+    assert served == [0, 1]
+    reneging = []
+    while not events.is_empty():
+        reneging.append(events.pop().customer)
+    assert sorted(reneging) == [2, 3, 4]
+
+
+def test_reneged_customers_are_never_served(tmp_path):
+    simulation = Simulation(
+        EventHeap(), queue_capacity=5, no_of_servers=2, arrival_distribution='Exponential(1.0)',
+        service_distribution='Exponential(2.5)', discipline='FIFO', t_star=2, k_star=3, duration=500, seed=1,
+        renege=True, renege_start=2, renege_half=5, renege_stop=10, trace=str(tmp_path)
+    )
+    simulation.run()
+    trace = Trace(str(tmp_path))
+    reneged = trace['outcome'] == Outcome.RENEGED
+    assert simulation.system.queue.no_of_reneging == reneged.sum() > 0
+    assert np.all(np.isnan(trace['service_start'][reneged]))
+    assert not simulation.system.queue.renege_events.keys() & set(trace['customer'][~reneged].tolist())
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from src.event import EventHeap
+from src.recurrence import run
+from src.simulation import Simulation
+
+
+def config(**settings):
+    return {
+        'queue_capacity': None, 'no_of_servers': 2, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3,
+        'arrival_distribution': 'Exponential(1.0)', 'service_distribution': 'Exponential(1.6)', 'duration': 1000,
+        **settings
+    }
+
+
+def simulate(settings, seed):
+    simulation = Simulation(EventHeap(), **settings, seed=seed, event_driven=True)
+    simulation.run()
+    return simulation.report()
+
+
+@pytest.mark.parametrize('no_of_servers, service', [(1, 'Constant(0.7)'), (2, 'Constant(2.5)'), (3, 'Constant(2.0)')])
+def test_deterministic_runs_match_event_simulation(no_of_servers, service):
+    settings = config(arrival_distribution='Constant(1.0)', service_distribution=service, no_of_servers=no_of_servers)
+    assert run(settings, 1, seed=1)[0] == simulate(settings, 1)
+
+
+@pytest.mark.parametrize('no_of_servers, service', [(1, 'Exponential(0.8)'), (2, 'Exponential(1.6)')])
+def test_random_runs_agree_with_event_simulation(no_of_servers, service):
+    settings = config(no_of_servers=no_of_servers, service_distribution=service, duration=20000)
+    vectorized = run(settings, 8, seed=1)
+    simulated = [simulate(settings, seed) for seed in range(4)]
+    for key in (
+        'average_no_of_customers_system', 'average_time_spent_per_customer_queue', 'average_server_utilization',
+        'proportion_of_customers_skip_queue', 'proportion_of_time_queue_contains_more_k_star_customers'
+    ):
+        expected = np.mean([report[key] for report in simulated])
+        assert np.mean([report[key] for report in vectorized]) == pytest.approx(expected, rel=0.1)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from src.event import EventHeap
+from src.simulation import Simulation
+
+
+def simulate(event_driven, **settings):
+    config = {
+        'queue_capacity': None, 'no_of_servers': 1, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3, 'duration': 20,
+        'arrival_distribution': 'Constant(1.0)', 'service_distribution': 'Constant(0.5)', **settings
+    }
+    simulation = Simulation(EventHeap(), **config, seed=1, event_driven=event_driven)
+    simulation.run()
+    return simulation.report()
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_exhausted_arrival_replay_stops_arrivals(event_driven):
+    report = simulate(event_driven, arrival_distribution=np.array([1.0, 1.0, 1.5, 2.0, 1.0]))
+    assert report['no_of_arrivals'] == 5
+    assert report['no_of_finished_customers'] == 5
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_exhausted_service_replay_never_ends_the_service(event_driven):
+    report = simulate(event_driven, service_distribution=np.array([0.5, 0.5]))
+    assert report['no_of_finished_customers'] == 2
+    assert report['no_of_unfinished_customers_service_center'] == 1
+    assert report['no_of_unfinished_customers'] == report['no_of_arrivals']-2
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_exhausted_arrival_batch_replay_falls_back_to_single_customers(event_driven):
+    report = simulate(event_driven, arrival_batch_probability=1, arrival_batch_distribution=np.array([2, 3]))
+    assert report['all_time_no_of_customers'] == 2+3+report['no_of_arrivals']-2
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+def test_exhausted_service_batch_replay_falls_back_to_single_customers(event_driven):
+    report = simulate(
+        event_driven, service_distribution='Constant(3.0)', service_batch_probability=1,
+        service_batch_distribution=np.array([2])
+    )
+    assert report['all_time_no_of_customers'] == report['no_of_arrivals']
+    assert report['no_of_finished_customers'] > 0
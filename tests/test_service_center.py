@@ -0,0 +1,62 @@
+import pytest
+from src.random_stream import RandomStream
+from src.service_center import ServerList
+
+
+def server_list(policy, no_of_servers=3, speeds=None):
+    return ServerList(no_of_servers, RandomStream(1), policy, speeds)
+
+
+def ids(servers, no_of_servers):
+    return [servers.get_server().id for _ in range(no_of_servers)]
+
+
+def test_random_assigns_each_idle_server_once():
+    servers = server_list('Random', 10)
+    assert sorted(ids(servers, 10)) == list(range(10))
+    assert not servers.is_there_idle_server()
+    servers.make_idle(servers.servers[4], 1.0)
+    assert servers.get_server().id == 4
+
+
+def test_round_robin_continues_after_the_last_assigned_server():
+    servers = server_list('Round Robin')
+    assert ids(servers, 2) == [0, 1]
+    servers.make_idle(servers.servers[0], 1.0)
+    assert servers.get_server().id == 2
+    servers.make_idle(servers.servers[1], 2.0)
+    servers.make_idle(servers.servers[2], 3.0)
+    assert ids(servers, 3) == [0, 1, 2]
+
+
+def test_longest_idle_picks_the_earliest_freed_server():
+    servers = server_list('Longest Idle')
+    ids(servers, 3)
+    servers.make_idle(servers.servers[2], 5.0)
+    servers.make_idle(servers.servers[0], 3.0)
+    servers.make_idle(servers.servers[1], 4.0)
+    assert ids(servers, 3) == [0, 1, 2]
+
+
+def test_least_utilized_picks_the_server_with_least_service_time():
+    servers = server_list('Least Utilized')
+    ids(servers, 3)
+    servers.statistics.total_service_time[:] = [4.0, 1.0, 2.0]
+    servers.reset_statistics()
+    servers.statistics.total_service_time[:] = [0.0, 2.0, 0.5]
+    for server in servers.servers:
+        servers.make_idle(server, 6.0)
+    assert ids(servers, 3) == [2, 1, 0]
+
+
+def test_fastest_picks_the_fastest_idle_server():
+    servers = server_list('Fastest', speeds=[1.0, 3.0, 2.0])
+    assert ids(servers, 3) == [1, 2, 0]
+    servers.make_idle(servers.servers[0], 1.0)
+    servers.make_idle(servers.servers[2], 1.0)
+    assert servers.get_server().id == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        server_list('Slowest')
@@ -0,0 +1,62 @@
+import pytest
+from src.event import EventHeap
+from src.recurrence import run
+from src.simulation import Simulation
+
+
+def config(**settings):
+    return {
+        'queue_capacity': None, 'no_of_servers': 1, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3,
+        'arrival_distribution': 'Constant(1.07)', 'service_distribution': 'Constant(5.0)', 'duration': 16,
+        **settings
+    }
+
+
+def simulate(settings, event_driven):
+    simulation = Simulation(EventHeap(), **settings, seed=1, event_driven=event_driven)
+    simulation.run()
+    return simulation.report()
+
+
+def test_tick_mode_stops_at_the_horizon():
+    settings = config()
+    tick, event_driven = simulate(settings, False), simulate(settings, True)
+    assert tick == event_driven
+    assert tick['no_of_arrivals'] == 14
+    assert tick['average_time_spent_per_customer_system'] == 6.91357
+
+
+@pytest.mark.parametrize('arrival, service, no_of_servers, duration', [
+    ('Constant(1.07)', 'Constant(5.0)', 1, 16),
+    ('Constant(0.93)', 'Constant(2.5)', 2, 16),
+    ('Constant(0.5)', 'Constant(3.05)', 3, 30.5)
+])
+def test_tick_and_event_driven_modes_match_the_recurrence(arrival, service, no_of_servers, duration):
+    settings = config(
+        arrival_distribution=arrival, service_distribution=service, no_of_servers=no_of_servers, duration=duration
+    )
+    tick, event_driven = simulate(settings, False), simulate(settings, True)
+    assert tick == event_driven
+    for key, value in run(settings, 1, seed=1)[0].items():
+        assert tick[key] == pytest.approx(value, abs=1e-4)
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+@pytest.mark.parametrize('settings', [
+    {'warmup': 'auto'},
+    {'precision': {'average_time_spent_per_customer_queue': 0.3}},
+    {'warmup': 'auto', 'precision': {'average_time_spent_per_customer_queue': 0.3}}
+])
+def test_snapshot_interval_does_not_change_checkpoints(settings, event_driven):
+    settings = config(
+        arrival_distribution='Exponential(1.0)', service_distribution='Exponential(1.8)', no_of_servers=2,
+        duration=2000, **settings
+    )
+    whole = Simulation(EventHeap(), **settings, seed=3, event_driven=event_driven)
+    whole.run()
+    live = Simulation(EventHeap(), **settings, seed=3, event_driven=event_driven)
+    snapshots = list(live.steps(10))
+    assert live.report() == whole.report()
+    assert (live.warmup, live.duration) == (whole.warmup, whole.duration)
+    assert snapshots[-1].time == live.duration
+    assert len(snapshots) == pytest.approx(live.duration/10, abs=1)
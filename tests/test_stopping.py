@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import scipy.stats as sc
+from src.event import EventHeap
+from src.simulation import Simulation
+from src.stopping import Estimate
+
+SETTINGS = {
+    'queue_capacity': None, 'no_of_servers': 2, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3, 'duration': 5000,
+    'arrival_distribution': 'Exponential(1.0)', 'service_distribution': 'Exponential(1.8)'
+}
+
+
+def test_estimate_matches_the_t_interval():
+    samples = np.random.default_rng(1).normal(3.0, 1.0, 12)
+    estimate = Estimate(samples.tolist(), 0.9)
+    lower, upper = sc.t.interval(0.9, len(samples)-1, loc=samples.mean(), scale=sc.sem(samples))
+    assert estimate.mean == pytest.approx(samples.mean())
+    assert (estimate.lower, estimate.upper) == pytest.approx((lower, upper))
+
+
+def test_unknown_metric_is_rejected():
+    with pytest.raises(ValueError):
+        Simulation(EventHeap(), **SETTINGS, precision={'no_of_finished_customers': 0.1}, seed=1)
+
+
+@pytest.mark.parametrize('warmup', [None, 'auto'])
+def test_run_stops_once_the_precision_is_reached(warmup):
+    target = 0.25
+    simulation = Simulation(
+        EventHeap(), **SETTINGS, warmup=warmup, precision={'average_no_of_customers_system': target}, seed=1
+    )
+    simulation.run()
+    assert simulation.stopping.is_met
+    assert simulation.duration < SETTINGS['duration']
+    assert simulation.time == simulation.duration
+    estimate = simulation.stopping.estimates['average_no_of_customers_system']
+    assert estimate.half_width <= target*abs(estimate.mean)
+
+
+def test_unreachable_precision_uses_the_whole_budget():
+    simulation = Simulation(
+        EventHeap(), **SETTINGS, precision={'average_time_spent_per_customer_queue': 0.001}, seed=1
+    )
+    simulation.run()
+    assert not simulation.stopping.is_met
+    assert simulation.duration == simulation.time == SETTINGS['duration']
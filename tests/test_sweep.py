@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from src.sweep import grid, point_key, sweep
+
+BASE = {
+    'queue_capacity': None, 'no_of_servers': 1, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3, 'duration': 200,
+    'arrival_distribution': 'Exponential(1.0)', 'service_distribution': 'Exponential(1.5)'
+}
+
+
+def key(service):
+    return point_key({**BASE, 'service_distribution': service}, 1)
+
+
+def test_point_key_hashes_array_contents():
+    trace = np.ones(10000)
+    other = trace.copy()
+    other[5000] = 2
+    assert str(trace) == str(other)
+    assert key(trace) != key(other)
+    assert key(trace) == key(trace.copy())
+    assert key(trace) != key(trace[None])
+
+
+def test_point_key_rejects_values_it_cannot_hash():
+    with pytest.raises(TypeError):
+        key(iter([1.0, 2.0]))
+
+
+def test_cache_needs_a_seed(tmp_path):
+    with pytest.raises(ValueError):
+        next(sweep(grid(BASE, {'no_of_servers': [1, 2]}), cache_dir=tmp_path))
+
+
+def test_cached_points_are_reused(tmp_path):
+    points = grid(BASE, {'no_of_servers': [1, 2]})
+    first = {config['no_of_servers']: result for config, result in sweep(points, seed=1, cache_dir=tmp_path)}
+    assert len(list(tmp_path.iterdir())) == 2
+    second = {config['no_of_servers']: result for config, result in sweep(points, seed=1, cache_dir=tmp_path)}
+    assert second == first
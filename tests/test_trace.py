@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from src.event import EventHeap
+from src.replication import replicate
+from src.simulation import Simulation
+from src.trace import Outcome, Trace, TraceRecorder
+
+CONFIG = {
+    'queue_capacity': 5, 'no_of_servers': 2, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3,
+    'arrival_distribution': 'Exponential(1.0)', 'service_distribution': 'Exponential(2.5)', 'duration': 200,
+    'renege': True, 'renege_start': 2, 'renege_half': 5, 'renege_stop': 10
+}
+
+
+def test_trace_round_trip(tmp_path):
+    simulation = Simulation(EventHeap(), **CONFIG, seed=1)
+    simulation.system.trace = TraceRecorder(str(tmp_path), chunk_size=64)
+    simulation.run()
+    report = simulation.report()
+    trace = Trace(str(tmp_path))
+    assert len(list(trace)) > 1
+    assert len(trace) == report['all_time_no_of_customers']
+    assert len(np.unique(trace['customer'])) == len(trace)
+    outcome = trace['outcome']
+    assert np.sum(outcome == Outcome.SERVED) == report['no_of_finished_customers']
+    assert np.sum(outcome == Outcome.UNFINISHED) == report['no_of_unfinished_customers']
+    assert np.sum(outcome == Outcome.TURNED_AWAY) == report['no_of_customers_turned_away']
+    assert np.sum(outcome == Outcome.RENEGED) == report['no_of_reneging']
+    served = outcome == Outcome.SERVED
+    assert np.all(trace['service_start'][served] <= trace['service_end'][served])
+    assert np.all(trace['arrival'][served] <= trace['service_start'][served])
+
+
+def test_recorder_refuses_to_overwrite_a_trace(tmp_path):
+    Simulation(EventHeap(), **CONFIG, seed=1, trace=str(tmp_path)).run()
+    with pytest.raises(FileExistsError):
+        Simulation(EventHeap(), **CONFIG, seed=2, trace=str(tmp_path))
+
+
+def test_replications_record_separate_traces(tmp_path):
+    replicate({**CONFIG, 'trace': str(tmp_path)}, 4, seed=1, max_workers=1)
+    directories = sorted(path.name for path in tmp_path.iterdir())
+    assert directories == ['run-0', 'run-1', 'run-2', 'run-3']
+    lengths = [len(Trace(str(tmp_path / directory))) for directory in directories]
+    assert all(length > 100 for length in lengths)
+    assert len(set(tuple(Trace(str(tmp_path / directory))['arrival'][:5]) for directory in directories)) == 4
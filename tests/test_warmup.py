@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from src.event import EventHeap
+from src.simulation import Simulation
+from src.warmup import mser
+
+
+def test_mser_truncates_the_transient():
+    series = np.concatenate([np.linspace(20, 5, 50), np.random.default_rng(1).normal(5, 1, 450)])
+    assert 40 <= mser(series) <= 60
+    assert mser(np.random.default_rng(1).normal(5, 1, 500)) < 50
+
+
+@pytest.mark.parametrize('event_driven', [False, True])
+@pytest.mark.parametrize('seed', [2, 4])
+def test_auto_warmup_matches_the_explicit_warmup(seed, event_driven):
+    settings = {
+        'queue_capacity': None, 'no_of_servers': 2, 'discipline': 'FIFO', 't_star': 2, 'k_star': 3, 'duration': 2000,
+        'arrival_distribution': 'Exponential(1.0)', 'service_distribution': 'Exponential(1.9)'
+    }
+    detected = Simulation(EventHeap(), **settings, warmup='auto', seed=seed, event_driven=event_driven)
+    detected.run()
+    assert detected.warmup > 0
+    explicit = Simulation(EventHeap(), **settings, warmup=detected.warmup, seed=seed, event_driven=event_driven)
+    explicit.run()
+    assert detected.report() == explicit.report()